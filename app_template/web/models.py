@@ -6,7 +6,7 @@ class {{ entity.name }}(models.Model):
     {{ field.name }} = models.{{ field.type }}
 {% endfor %}
 {% for rel in entity.relationships %}{% if rel.type == 'ForeignKey' %}
-    {{ rel.name }} = models.ForeignKey('{{ rel.related_to }}', on_delete=models.CASCADE, related_name='{{ rel.related_name }}')
+    {{ rel.name }} = models.ForeignKey('{{ rel.related_to }}', on_delete=models.CASCADE{% if rel.related_name %}, related_name='{{ rel.related_name }}'{% endif %})
 {% elif rel.type == 'ManyToManyField' %}
     {{ rel.name }} = models.ManyToManyField('{{ rel.related_to }}')
 {% elif rel.type == 'OneToOneField' %}
@@ -115,6 +115,7 @@ class EnsureServerStarts(Phase):
         user_prompt = f"Here's the server output: \n{output}" if output else "Server did not produce any output"
         messages = [{"role": "user", "content": user_prompt}]
         result = agent.run_streaming_conversation(EnsureServerStarts.SYSTEM_PROMPT, messages)
+        self.logger.info(f"  Total input tokens: {result['total_input_tokens']}")
         self.logger.info(f"  Total output tokens: {result['total_output_tokens']}")
         self.logger.info(f"  Total API duration: {result.get('total_api_duration', 0):.2f}s")
 
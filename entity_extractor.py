@@ -1,5 +1,6 @@
 import logging
-from pydantic import BaseModel
+from colors import Colors
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from llm_cache.anthropic_cached import CachedAnthropic
 from tool_definitions import (
     Tool, string_param, array_param, object_param, to_anthropic
@@ -14,7 +15,8 @@ class EntityRelationship(BaseModel):
     name: str
     type: str
     related_to: str
-    related_name: str
+    # Only ForeignKey fields are generated with a related_name
+    related_name: str | None = None
 
 
 class Entity(BaseModel):
@@ -23,8 +25,12 @@ class Entity(BaseModel):
     relationships: list[EntityRelationship] = []
 
 
+# Validates a whole list in one call instead of constructing the entities one by one
+ENTITIES_ADAPTER = TypeAdapter(list[Entity])
+
+
 def to_entities(raw_data: list[dict]) -> list[Entity]:
-    return [Entity(**item) for item in raw_data]
+    return ENTITIES_ADAPTER.validate_python(raw_data)
 
 
 ENTITY_EXTRACTION_TOOL = Tool(
@@ -64,7 +70,7 @@ ENTITY_EXTRACTION_TOOL = Tool(
                                 "name": string_param("name", "Relationship field name", required=True),
                                 "type": string_param("type", "Relationship type like 'ForeignKey', 'ManyToManyField', 'OneToOneField'", required=True),
                                 "related_to": string_param("related_to", "The related model name, e.g. 'User' for author field", required=True),
-                                "related_name": string_param("related_name", "The related name for reverse lookups, e.g. 'posts' for author->posts relationship", required=True)
+                                "related_name": string_param("related_name", "The related name for reverse lookups of a ForeignKey, e.g. 'posts' for author->posts relationship. Omit it for other relationship types", required=False)
                             }
                         )
                     )
@@ -74,26 +80,55 @@ ENTITY_EXTRACTION_TOOL = Tool(
     ]
 )
 
+# Converted once: the tool schema is the same for every extraction request
+ENTITY_EXTRACTION_TOOLS = [to_anthropic(ENTITY_EXTRACTION_TOOL)]
+
+# How many times the model is asked to correct entities that fail validation
+ENTITY_EXTRACTION_MAX_RETRIES = 2
+
 
 class EntityExtractor:
     def __init__(self, client: CachedAnthropic, model: str = "claude-3-sonnet-20240229"):
         self.client = client
         self.model = model
+        self.logger = logging.getLogger(__class__.__qualname__)
     
     def extract_entities(self, user_prompt: str) -> list[dict]:
+        messages = [{"role": "user", "content": user_prompt}]
+
+        for attempt in range(ENTITY_EXTRACTION_MAX_RETRIES + 1):
+            message = self.create_message(messages)
+            entities_data = self.extract_entities_from_response(message)
+            try:
+                to_entities(entities_data)
+                return entities_data
+            except ValidationError as e:
+                if attempt == ENTITY_EXTRACTION_MAX_RETRIES:
+                    raise
+                # Send the validation errors back as the tool result, instead of repeating the whole generation
+                self.logger.info(f"{Colors.BRIGHT_YELLOW}[RETRY]{Colors.END} Extracted entities are invalid (attempt {attempt + 1}/{ENTITY_EXTRACTION_MAX_RETRIES + 1}), asking for a correction")
+                messages = messages + [
+                    {"role": "assistant", "content": message.content},
+                    {"role": "user", "content": [{
+                        "type": "tool_result",
+                        "tool_use_id": self.find_entities_tool_use(message).id,
+                        "content": f"The entities are invalid:\n{e}\nCall the tool again with all entities, corrected.",
+                        "is_error": True,
+                    }]},
+                ]
+
+    def create_message(self, messages: list):
         system_prompt = "You are an expert Django developer and an excellent data modeler."
 
-        message = self.client.create(
+        return self.client.create(
             model=self.model,
             system=system_prompt,
-            messages=[{"role": "user", "content": user_prompt}],
-            tools=[to_anthropic(ENTITY_EXTRACTION_TOOL)],
+            messages=messages,
+            tools=ENTITY_EXTRACTION_TOOLS,
             max_tokens=10000,
             temperature=1
         )
 
-        return self.extract_entities_from_response(message)
-
 
     def display_entities(self, entities: list[Entity]) -> None:
         """Display entities in a simple format"""
@@ -108,15 +143,14 @@ class EntityExtractor:
 
     def extract_entities_from_response(self, message) -> list[dict]:
         """Extract entities from LLM response"""
-        entities_data = []
-
-        if hasattr(message, 'content'):
-            for content_block in message.content:
-                if hasattr(content_block, 'type') and content_block.type == 'tool_use':
-                    if hasattr(content_block, 'name') and content_block.name == 'entities':
-                        if hasattr(content_block, 'input') and isinstance(content_block.input, dict):
-                            entities_data = content_block.input.get('entities', [])
-                        break
-
-        return entities_data
+        tool_use = self.find_entities_tool_use(message)
+        tool_input = tool_use.input if tool_use is not None else None
+        return tool_input.get('entities', []) if isinstance(tool_input, dict) else []
+
+    def find_entities_tool_use(self, message):
+        """First call of the entities tool in the response, or None"""
+        return next((
+            content_block for content_block in message.content
+            if content_block.type == 'tool_use' and content_block.name == 'entities'
+        ), None)
 
@@ -1,7 +1,5 @@
 import asyncio
-from anthropic import AsyncAnthropic
 import os
-from colors import Colors
 from phase_manager import State, Phase, Context
 from tree_printer import tree_section, tree_success, tree_error
 from fileutils import LLMFileGenerator
@@ -23,7 +21,6 @@ You must respect facts provided to you about the app.
 class LayoutImplementationAgent:
     def __init__(self, project_path: str):
         self.project_path = project_path
-        self.anthropic_client = AsyncAnthropic()
         self.files_created = []
         self.generator = LLMFileGenerator(max_tokens=10000)
 
@@ -69,7 +66,8 @@ class ExecuteLayouts(Phase):
                 for layout in layouts
             ]
 
-            await asyncio.gather(*tasks)
+            async with context.anthropic_client.async_session():
+                await asyncio.gather(*tasks)
 
             tree_success(f"All {len(layouts)} layouts completed successfully")
 
@@ -1,11 +1,34 @@
+import asyncio
 import os
-import re
 from colors import Colors
 from phase_manager import State, Phase, Context
 from implementation_agent import ImplementationAgent
 import logging
 from utils.logging_util import LoggingUtil
 
+STEP_OPEN_TAG = '<step'
+STEP_CLOSE_TAG = '</step>'
+
+
+def parse_steps(work: str) -> list[str]:
+    """
+    Extract the stripped contents of <step ...>...</step> tags in order.
+
+    A plain str.find scan: equivalent to matching <step[^>]*>(.*?)</step> with DOTALL, without regex overhead.
+    """
+    steps = []
+    pos = 0
+    while (tag_start := work.find(STEP_OPEN_TAG, pos)) != -1:
+        content_start = work.find('>', tag_start + len(STEP_OPEN_TAG))
+        if content_start == -1:
+            break
+        content_end = work.find(STEP_CLOSE_TAG, content_start + 1)
+        if content_end == -1:
+            break
+        steps.append(work[content_start + 1:content_end].strip())
+        pos = content_end + len(STEP_CLOSE_TAG)
+    return steps
+
 
 class ExecuteWork(Phase):
     description = "Execute the planned work items"
@@ -36,45 +59,74 @@ class ExecuteWork(Phase):
 
         # Parse work into an array by extracting content between <step> tags
         self.logger.info(f"{Colors.BRIGHT_CYAN}[PARSING]{Colors.END} Parsing steps from work content...")
-        step_pattern = r'<step[^>]*>(.*?)</step>'
-        steps = re.findall(step_pattern, work, re.DOTALL)
-        self.logger.info(f"{Colors.BRIGHT_CYAN}[PARSING]{Colors.END} Found {len(steps)} step matches with regex")
-
-        # Clean up the extracted steps (remove leading/trailing whitespace)
-        steps = [step.strip() for step in steps]
+        # Clean up the extracted steps (remove leading/trailing whitespace) as they are matched
+        steps = parse_steps(work)
+        self.logger.info(f"{Colors.BRIGHT_CYAN}[PARSING]{Colors.END} Found {len(steps)} step matches")
 
         self.logger.info(f"{Colors.BRIGHT_GREEN}[PARSING]{Colors.END} Step parsing completed:")
         self.logger.info(f"  Found {len(steps)} steps after cleanup")
 
+        # Regenerated work may repeat a step verbatim; implementing it again only costs another round-trip
+        parsed_steps_count = len(steps)
+        steps = self.deduplicate_steps(steps)
+        duplicate_steps_count = parsed_steps_count - len(steps)
+        unique_steps_count = len(steps)
+
+        # Small consecutive steps can share one conversation, so the project context is sent once for all of them
+        batch_max_chars = int(os.getenv('EXECUTE_BATCH_MAX_CHARS', '0'))
+        if batch_max_chars > 0:
+            steps = self.batch_steps(steps, batch_max_chars)
+            self.logger.info(f"{Colors.BRIGHT_CYAN}[PARSING]{Colors.END} Batched small steps into {len(steps)} steps (up to {batch_max_chars} characters each)")
+
         # Print the array
-        self.logger.info(f"{Colors.BRIGHT_MAGENTA}[STEPS]{Colors.END} Parsed steps array:")
-        for i, step in enumerate(steps):
-            self.logger.info(f"{Colors.BRIGHT_GREEN}Step {i+1}:{Colors.END}")
-            self.logger.info(f"  Length: {len(step)} characters")
-            self.logger.info(f"  Preview: {step[:100]}..." if len(step) > 100 else f"  Content: {step}")
-            self.logger.info("-" * 40)
+        if context.verbose:
+            self.logger.info(f"{Colors.BRIGHT_MAGENTA}[STEPS]{Colors.END} Parsed steps array:")
+            for i, step in enumerate(steps):
+                self.logger.info(f"{Colors.BRIGHT_GREEN}Step {i+1}:{Colors.END}")
+                self.logger.info(f"  Length: {len(step)} characters")
+                self.logger.info(f"  Preview: {step[:100]}..." if len(step) > 100 else f"  Content: {step}")
+                self.logger.info("-" * 40)
 
         # Create implementation agent with provider support
         self.logger.info(f"{Colors.BRIGHT_YELLOW}[AGENT]{Colors.END} Creating implementation agent with provider: {provider}")
-        agent = ImplementationAgent(project_path, context, provider=provider, facts=facts)
+        # Steps are planned in dependency order, so they run one by one unless explicitly allowed otherwise
+        max_parallel = int(os.getenv('EXECUTE_MAX_PARALLEL', '1'))
+        # Concurrent steps would otherwise run into the account's rate limit and spend their time in retries
+        requests_per_minute = int(os.getenv('ANTHROPIC_RPM', '50')) if max_parallel > 1 else None
+        agent = ImplementationAgent(project_path, context, provider=provider, facts=facts, interactive=False,
+                                    requests_per_minute=requests_per_minute)
+        # Message batches halve the price but every conversation turn waits for a whole batch,
+        # so they are only used when explicitly requested
+        use_batch = os.getenv('EXECUTE_USE_BATCH', '').lower() in ('1', 'true', 'yes') and provider == 'anthropic'
 
         # Initialize API duration tracking
         total_api_duration = 0.0
 
         # Process each step
         self.logger.info(f"\n{Colors.BRIGHT_YELLOW}[PROCESSING]{Colors.END} Processing steps with implementation agent:")
-        for i, step in enumerate(steps):
-            with LoggingUtil.Span(f"Processing step {i+1}/{len(steps)}"):
-                self.logger.info(f"{Colors.BRIGHT_CYAN}=== Processing step {i+1}/{len(steps)} ==={Colors.END}")
-                self.logger.info(f"Content preview: {step[:100]}..." if len(step) > 100 else f"Content: {step}")
-
-                # Implement the step
-                result = agent.implement_step(step)
-                step_api_duration = result.get('total_api_duration', 0)
-                total_api_duration += step_api_duration
-
-                self.logger.info(f"{Colors.BRIGHT_GREEN}[PROCESSING]{Colors.END} Step {i+1} processing completed")
-                self.logger.info("")
+        if use_batch:
+            # Steps of one batch run side by side, so at most max_parallel consecutive steps share a batch
+            # and each group starts from the project state left by the previous one
+            for start in range(0, len(steps), max_parallel):
+                group = steps[start:start + max_parallel]
+                with LoggingUtil.Span(f"Processing steps {start+1}-{start+len(group)}/{len(steps)} as a message batch"):
+                    results = agent.implement_steps_batch(group)
+                total_api_duration += sum(result.get('total_api_duration', 0) for result in results)
+        elif max_parallel > 1:
+            with LoggingUtil.Span(f"Processing {len(steps)} steps, up to {max_parallel} at a time"):
+                results = asyncio.run(self.process_steps_async(agent, steps, max_parallel, context))
+            total_api_duration = sum(result.get('total_api_duration', 0) for result in results)
+        else:
+            for i, step in enumerate(steps):
+                with LoggingUtil.Span(f"Processing step {i+1}/{len(steps)}"):
+                    self.logger.info(self.format_step_header(i, len(steps), step))
+
+                    # Implement the step
+                    result = agent.implement_step(step)
+                    step_api_duration = result.get('total_api_duration', 0)
+                    total_api_duration += step_api_duration
+
+                    self.logger.info(f"{Colors.BRIGHT_GREEN}[PROCESSING]{Colors.END} Step {i+1} processing completed\n")
 
         # Format duration for display
         minutes = int(total_api_duration // 60)
@@ -83,7 +135,63 @@ class ExecuteWork(Phase):
         self.logger.info(f"{Colors.BRIGHT_MAGENTA}=== EXECUTE WORK PHASE COMPLETED ==={Colors.END}")
         self.logger.info(f"{Colors.BRIGHT_YELLOW}[SUMMARY]{Colors.END} Final summary:")
         self.logger.info(f"  Provider used: {provider}")
-        self.logger.info(f"  Steps processed: {len(steps)}")
+        self.logger.info(f"  Steps processed: {unique_steps_count}")
+        if len(steps) != unique_steps_count:
+            self.logger.info(f"  Step conversations (after batching small steps): {len(steps)}")
+        self.logger.info(f"  Duplicate steps skipped: {duplicate_steps_count}")
         self.logger.info(f"  Total duration ({provider}, API): {minutes}m {seconds}s")
 
         return {}
+
+    def format_step_header(self, i: int, total: int, step: str) -> str:
+        """Step banner and content preview as one multi-line message, so a step start is a single log record"""
+        content = f"Content preview: {step[:100]}..." if len(step) > 100 else f"Content: {step}"
+        return f"{Colors.BRIGHT_CYAN}=== Processing step {i+1}/{total} ==={Colors.END}\n{content}"
+
+    def deduplicate_steps(self, steps: list[str]) -> list[str]:
+        """Drop steps identical to an earlier one, keeping the order of first occurrences"""
+        seen: set[str] = set()
+        unique_steps = []
+        for i, step in enumerate(steps):
+            if step in seen:
+                preview = f"{step[:100]}..." if len(step) > 100 else step
+                self.logger.info(f"{Colors.BRIGHT_YELLOW}[DEDUP]{Colors.END} Skipping step {i+1}, identical to step {steps.index(step)+1}: {preview}")
+                continue
+            seen.add(step)
+            unique_steps.append(step)
+        return unique_steps
+
+    def batch_steps(self, steps: list[str], max_chars: int) -> list[str]:
+        """Merge runs of consecutive steps whose combined text fits into max_chars into single steps"""
+        batches: list[list[str]] = []
+        batch_chars = 0
+        for step in steps:
+            if batches and batch_chars + len(step) <= max_chars:
+                batches[-1].append(step)
+                batch_chars += len(step)
+            else:
+                batches.append([step])
+                batch_chars = len(step)
+
+        return [
+            batch[0] if len(batch) == 1 else "\n".join(
+                f'<part index="{k+1}" of="{len(batch)}">\n{step}\n</part>' for k, step in enumerate(batch)
+            )
+            for batch in batches
+        ]
+
+    async def process_steps_async(self, agent: ImplementationAgent, steps: list[str], max_parallel: int, context: Context) -> list[dict]:
+        """Implement steps concurrently, at most max_parallel at a time. Results are returned in step order."""
+        semaphore = asyncio.Semaphore(max_parallel)
+
+        async def process_step(i: int, step: str) -> dict:
+            async with semaphore:
+                self.logger.info(self.format_step_header(i, len(steps), step))
+
+                result = await agent.implement_step_async(step)
+
+                self.logger.info(f"{Colors.BRIGHT_GREEN}[PROCESSING]{Colors.END} Step {i+1} processing completed")
+                return result
+
+        async with context.anthropic_client.async_session():
+            return await asyncio.gather(*(process_step(i, step) for i, step in enumerate(steps)))
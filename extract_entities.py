@@ -25,16 +25,21 @@ def extract_entities(context: Context, spec: str, existing_entities=None, spec_d
 
         return entities_data
 
+# Line formats for display_entities, with the colors filled in once
+ENTITY_LINE_FORMAT = f"  - {Colors.BOLD}{Colors.BRIGHT_GREEN}{{}}{Colors.END}"
+RELATIONSHIP_LINE_FORMAT = f"      {Colors.BRIGHT_MAGENTA}{{}}{Colors.END}: {{}} -> {Colors.BRIGHT_GREEN}{{}}{Colors.END}"
+FIELD_LINE_FORMAT = f"      {Colors.BRIGHT_YELLOW}{{}}{Colors.END}: {{}}"
+
 def display_entities(entities: list[Entity], logger):
     """Display entities in a formatted way"""
-    lines = []
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    lines = ["Entities extracted:"]
     for entity in entities:
-        lines.append(f"  - {Colors.BOLD}{Colors.BRIGHT_GREEN}{entity.name}{Colors.END}")
-        for rel in entity.relationships:
-            lines.append(f"      {Colors.BRIGHT_MAGENTA}{rel.name}{Colors.END}: {rel.type} -> {Colors.BRIGHT_GREEN}{rel.related_to}{Colors.END}")
-        for field in entity.fields:
-            lines.append(f"      {Colors.BRIGHT_YELLOW}{field.name}{Colors.END}: {field.type}")
-    logger.info(f"Entities extracted:\n" + "\n".join(lines))
+        lines.append(ENTITY_LINE_FORMAT.format(entity.name))
+        lines.extend(RELATIONSHIP_LINE_FORMAT.format(rel.name, rel.type, rel.related_to) for rel in entity.relationships)
+        lines.extend(FIELD_LINE_FORMAT.format(field.name, field.type) for field in entity.fields)
+    logger.info("\n".join(lines))
 
 class ExtractEntities(Phase):
     def __init__(self):
@@ -3,10 +3,11 @@ from typing import Optional
 from colors import Colors
 from data_serializer import text_file
 from phase_manager import State, Phase, Context
-from with_step import with_streaming_step
+from with_step import with_streaming_step, stream_text
 from fileutils import load_prompt_template, format_file_content
 
 SYSTEM_PROMPT = "You are an expert at analyzing project specifications and extracting key facts."
+SYSTEM_PROMPT_WORDS = len(SYSTEM_PROMPT.split())
 
 def extract_facts(context: Context, spec: str, stories: Optional[str] = None,
                  spec_diff: Optional[str] = None, old_stories: Optional[str] = None,
@@ -24,11 +25,12 @@ def extract_facts(context: Context, spec: str, stories: Optional[str] = None,
             user_prompt = load_prompt_template("extract_facts", incremental=False,
                                              spec=spec, stories=stories)
 
-        input_tokens[0] = len(user_prompt.split()) + len(SYSTEM_PROMPT.split())
+        input_tokens[0] = user_prompt.count(' ') + 1 + SYSTEM_PROMPT_WORDS
 
-        logging.getLogger(ExtractFacts.__class__.__qualname__).info(user_prompt)
+        # The prompt contains the whole spec and stories, so it is only dumped in verbose mode
+        if context.verbose:
+            logging.getLogger(ExtractFacts.__class__.__qualname__).info(user_prompt)
 
-        response_text = ""
         with context.anthropic_client.stream(
             model="claude-3-7-sonnet-latest",
             max_tokens=16000,
@@ -41,11 +43,9 @@ def extract_facts(context: Context, spec: str, stories: Optional[str] = None,
                 }
             ]
         ) as stream:
-            for text in stream.text_stream:
-                response_text += text
-                output_tokens[0] += len(text.split())
+            response = stream_text(stream, input_tokens, output_tokens)
 
-        return response_text
+        return response
 
 class ExtractFacts(Phase):
     def __init__(self):
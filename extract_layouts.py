@@ -3,13 +3,15 @@ import logging
 from typing import Optional
 from anthropic.types import ToolParam
 from colors import Colors
-from data_serializer import text_file
 from phase_manager import State, Phase, Context
 from with_step import with_step
 from fileutils import load_prompt_template, format_file_content
 
 SYSTEM_PROMPT = "You are a senior web developer who specialized in Django."
 
+# Specs shorter than this describe few screens, and thinking mostly adds latency to planning their layouts
+THINKING_MIN_SPEC_CHARS = 2000
+
 LAYOUT_TOOLS_SCHEMA: list[ToolParam] = [
     ToolParam(
         name="layouts",
@@ -63,6 +65,13 @@ def extract_layouts(context: Context, spec: str, stories: str,
             user_prompt = load_prompt_template("extract_layouts",
                                              spec=spec, stories=stories)
 
+        request_params = {}
+        if len(spec) >= THINKING_MIN_SPEC_CHARS:
+            request_params["thinking"] = {
+                "type": "enabled",
+                "budget_tokens": 4000
+            }
+
         message = context.anthropic_client.create(
             model="claude-3-7-sonnet-latest",
             max_tokens=8192,
@@ -74,11 +83,8 @@ def extract_layouts(context: Context, spec: str, stories: str,
                     "content": user_prompt
                 }
             ],
-            thinking={
-                "type": "enabled",
-                "budget_tokens": 4000
-            },
-            tools=LAYOUT_TOOLS_SCHEMA
+            tools=LAYOUT_TOOLS_SCHEMA,
+            **request_params
         )
 
         layouts_data = []
@@ -25,7 +25,19 @@ class Serializer:
 
     def make_serializable(self, obj, is_key: bool = False):
         """Convert params to a serializable format, handling Pydantic models"""
-        if hasattr(obj, 'model_dump'): 
+        # Fast paths for the plain JSON types that make up most of a request, checked by exact type
+        # so that subclasses (e.g. str enums) still take the generic branches below
+        obj_type = type(obj)
+        if obj_type is str:
+            return self.sanitizer.sanitize_str(obj)
+        elif obj_type is dict:
+            return self.sanitizer.sanitize_dict(
+                {self.make_serializable(k, is_key=True): self.make_serializable(v) for k, v in obj.items()}
+            )
+        elif obj_type is list:
+            return [self.make_serializable(item) for item in obj]
+
+        if hasattr(obj, 'model_dump'):
             return self.sanitizer.sanitize_dict({
                 "__pydantic_model_module": obj.__class__.__module__,
                 "__pydantic_model_name": obj.__class__.__name__,
@@ -80,7 +92,7 @@ class Serializer:
 class CacheKey:
     def __init__(self, key_source: Any, serializer: Serializer):
         self.serializer = serializer
-        self._raw_source = key_source
+        self._is_text = isinstance(key_source, str)
         self._prepared_source = self._make_hashable(key_source)
         self._hash = hashlib.sha256(self._prepared_source.encode()).hexdigest()
         
@@ -97,21 +109,31 @@ class CacheKey:
     def hash(self) -> str:
         return self._hash
     
+    @property
+    def is_text(self) -> bool:
+        return self._is_text
+
     @property
     def key_source(self) -> str:
-        return self._prepared_source
+        """Key source as written to the .src file: indented, so that it can be read and diffed"""
+        if self._is_text:
+            return self._prepared_source
+        else:
+            # Only needed on a cache miss, so re-parsing the compact form is cheaper than keeping the structure
+            return json.dumps(json.loads(self._prepared_source), sort_keys=True, indent=2)
 
-    def _make_hashable(self, raw_source: Any) -> str:        
+    def _make_hashable(self, raw_source: Any) -> str:
         serializable = self.serializer.make_serializable(raw_source)
-        
+
         if isinstance(serializable, str):
             return serializable
         else:
-            return json.dumps(serializable, sort_keys=True, indent=2)
+            # Compact separators keep json on its C encoder; only the hash depends on this form
+            return json.dumps(serializable, sort_keys=True, separators=(',', ':'))
 
 
 class FileBasedCache:
-    VERSION = (0, 0, 2)
+    VERSION = (0, 0, 3)
     VERSION_STRING = ".".join(map(str, VERSION))
 
     hit_count: int = 0
@@ -170,7 +192,7 @@ class FileBasedCache:
             self._file_name(key.hash, "json").write_text(
                 json.dumps(self.value_serializer.make_serializable(value), sort_keys=True, indent=2))
 
-        if isinstance(key._raw_source, str):
+        if key.is_text:
             self._file_name(f"{key.hash}.src", "txt").write_text(key.key_source)
         else:
             self._file_name(f"{key.hash}.src", "json").write_text(key.key_source)
@@ -250,7 +272,8 @@ class CacheMetadata:
         self.save(data)
 
     def save(self, data):
-        self.file_name.write_text(json.dumps(data, indent=2, sort_keys=True))
+        # Rewritten on every cache hit and miss: without indent, json uses its C encoder
+        self.file_name.write_text(json.dumps(data, sort_keys=True))
 
 
 if __name__ == "__main__":
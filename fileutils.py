@@ -1,7 +1,8 @@
+import functools
 import os
 from dataclasses import dataclass
 from typing import cast
-from jinja2 import Template, Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader
 from anthropic.types import ToolParam
 
 @dataclass
@@ -27,14 +28,13 @@ def format_file_content(content: str, offset: int | None = None, limit: int | No
         Tuple of (formatted_content, FileMetadata)
         where FileMetadata contains: lines_processed, truncated, start_line, end_line, total_lines
     """
-    lines = []
     truncated = False
     
     # Process lines for display
     all_lines = content.splitlines()
     
     # Determine which lines to process
-    start_line = (offset - 1) if offset is not None else 0
+    start_line = max(offset - 1, 0) if offset is not None else 0
     end_line = len(all_lines)
     
     if limit is not None and offset is not None:
@@ -42,18 +42,15 @@ def format_file_content(content: str, offset: int | None = None, limit: int | No
     elif limit is not None and offset is None:
         end_line = min(len(all_lines), limit)
     
-    for i in range(start_line, end_line):
-        line = all_lines[i]
-        line_number = i + 1
-        
-        # Truncate long lines if specified
-        line_content = line
-        if truncate_line is not None and len(line_content) > truncate_line:
-            line_content = line_content[:truncate_line] + '... (truncated)'
-        
-        # Format with line numbers (cat -n style)
-        formatted_line = f"{line_number}\t{line_content}"
-        lines.append(formatted_line)
+    # Slice the requested window instead of indexing line by line
+    window = all_lines[start_line:end_line]
+    
+    # Truncate long lines if specified
+    if truncate_line is not None:
+        window = [line if len(line) <= truncate_line else line[:truncate_line] + '... (truncated)' for line in window]
+    
+    # Format with line numbers (cat -n style)
+    lines = [f"{line_number}\t{line}" for line_number, line in enumerate(window, start=start_line + 1)]
     
     # Check if we truncated due to limit
     if limit is not None and len(all_lines) > end_line:
@@ -71,6 +68,12 @@ def format_file_content(content: str, offset: int | None = None, limit: int | No
     
     return display_content, metadata
 
+@functools.lru_cache(maxsize=None)
+def get_template_environment(template_dir: str) -> Environment:
+    """Jinja2 environment for a template directory, shared so that compiled templates are cached between renders"""
+    return Environment(loader=FileSystemLoader(template_dir))
+
+
 def load_template(template_path: str, **kwargs) -> str:
     """
     Load a Jinja2 template file and render it with provided kwargs.
@@ -86,9 +89,8 @@ def load_template(template_path: str, **kwargs) -> str:
     template_dir = os.path.dirname(template_path)
     template_name = os.path.basename(template_path)
 
-    # Create a Jinja2 environment with FileSystemLoader
-    env = Environment(loader=FileSystemLoader(template_dir))
-    template = env.get_template(template_name)
+    # The environment reuses the compiled template while the file is unchanged
+    template = get_template_environment(template_dir).get_template(template_name)
 
     return template.render(**kwargs)
 
@@ -6,7 +6,7 @@ import logging
 from jinja2 import Environment, FileSystemLoader
 from fileutils import load_prompt_template, LLMFileGenerator
 
-from extract_entities import Entity, to_entities
+from extract_entities import Entity
 from phase_manager import State, Phase, Context
 
 def generate_models_from_template(project_path: str, project_name: str, entities: list[Entity], app_name: str = "web"):
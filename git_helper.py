@@ -1,6 +1,4 @@
-import os
 import subprocess
-import time
 import logging
 
 class GitHelper:
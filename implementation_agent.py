@@ -1,20 +1,73 @@
 from anthropic import APIStatusError
 from anthropic.types import ToolParam
+import asyncio
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import json
 import difflib
+import functools
 import time
 import random
+import re
+import stat
+import sys
+import tempfile
 import logging
 from typing import cast
 from colors import Colors
-from google import genai
-from google.genai import types as gemini_types
 from phase_manager import Context
 from tree_printer import tree_section, tree_info
 from fileutils import format_file_content
 from utils.logging_util import LoggingUtil
 
+# Number of recent file operations an agent keeps in its history
+HISTORY_MAX_ENTRIES = 1000
+
+# Tools that only read the project, so calls to them can run concurrently
+READ_ONLY_TOOLS = frozenset({"list_files", "read_file"})
+MAX_CONCURRENT_TOOL_CALLS = 8
+
+# Longer edit diffs are still returned to the model in full, but only their start is logged
+MAX_LOGGED_DIFF_LINES = 500
+
+# Output token ceiling for a conversation turn. Most turns end in a short tool call, so a turn is only
+# repeated with the larger ceiling when the model actually ran out of tokens.
+MAX_OUTPUT_TOKENS = 2048
+MAX_OUTPUT_TOKENS_RETRY = 10000
+
+# Line boundaries str.splitlines() recognizes besides '\n', with '\r\n' counted as one
+OTHER_LINE_BREAKS = re.compile('\r\n|[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+
+# Colored log tags, formatted once instead of on every file operation and conversation turn
+_TAG_FILE_OP = f"{Colors.BRIGHT_YELLOW}[FILE OP]{Colors.END}"
+_TAG_FILE_OP_DONE = f"{Colors.BRIGHT_GREEN}[FILE OP]{Colors.END}"
+_TAG_FILE_OP_ERROR = f"{Colors.BRIGHT_RED}[FILE OP ERROR]{Colors.END}"
+_TAG_FILE_EDIT = f"{Colors.BRIGHT_YELLOW}[FILE EDIT]{Colors.END}"
+_TAG_EDIT = f"{Colors.BRIGHT_CYAN}[EDIT]{Colors.END}"
+_TAG_EDIT_DONE = f"{Colors.BRIGHT_GREEN}[EDIT]{Colors.END}"
+_TAG_EDIT_ERROR = f"{Colors.BRIGHT_RED}[EDIT ERROR]{Colors.END}"
+_TAG_TOOL_EXECUTION = f"{Colors.BRIGHT_CYAN}[TOOL EXECUTION]{Colors.END}"
+_TAG_AI_REQUEST = f"{Colors.BRIGHT_MAGENTA}[AI REQUEST]{Colors.END}"
+_TAG_AI_STREAMING = f"{Colors.BRIGHT_GREEN}[AI STREAMING]{Colors.END}"
+_TAG_CONVERSATION = f"{Colors.BRIGHT_GREEN}[CONVERSATION]{Colors.END}"
+_TAG_RETRY = f"{Colors.BRIGHT_YELLOW}[RETRY]{Colors.END}"
+_TAG_AGENT_INIT = f"{Colors.BRIGHT_BLUE}[AGENT INIT]{Colors.END}"
+_TAG_AGENT = f"{Colors.BRIGHT_CYAN}[AGENT]{Colors.END}"
+_TAG_PROMPT = f"{Colors.BRIGHT_CYAN}[PROMPT]{Colors.END}"
+_TAG_IMPLEMENTATION = f"{Colors.BRIGHT_GREEN}[IMPLEMENTATION]{Colors.END}"
+_TAG_AI_STREAMING_START = f"{Colors.BRIGHT_MAGENTA}[AI STREAMING]{Colors.END}"
+_TAG_AI_RESPONSE = f"{Colors.BRIGHT_MAGENTA}[AI RESPONSE]{Colors.END}"
+_TAG_AI_RESPONSE_GEMINI = f"{Colors.BRIGHT_GREEN}[AI RESPONSE]{Colors.END}"
+_TAG_ERROR = f"{Colors.BRIGHT_RED}[ERROR]{Colors.END}"
+_TAG_CONFIRMATION = f"{Colors.BRIGHT_YELLOW}[CONFIRMATION]{Colors.END}"
+_TAG_INPUT = f"{Colors.BRIGHT_CYAN}[INPUT]{Colors.END}"
+_TAG_ALWAYS_YES = f"{Colors.BRIGHT_GREEN}[ALWAYS YES]{Colors.END}"
+_TAG_EXIT = f"{Colors.BRIGHT_RED}[EXIT]{Colors.END}"
+_TAG_INVALID = f"{Colors.BRIGHT_RED}[INVALID]{Colors.END}"
+_TAG_TOOL_RESULT = f"{Colors.BRIGHT_GREEN}[TOOL RESULT]{Colors.END}"
+_TAG_TOOL_RESULT_ERROR = f"{Colors.BRIGHT_RED}[TOOL RESULT]{Colors.END}"
+
 # Tool definitions constant for reuse
 TOOLS_DEFINITIONS = [
     {
@@ -155,6 +208,50 @@ def tools_prompt(tools_definitions: list[dict]):
             2. **Read Before Write**: ALWAYS use read_file before edit_file or write_file.
             """
 
+# Tools prompt for the default tool set, rendered once instead of per agent
+DEFAULT_TOOLS_PROMPT = tools_prompt(TOOLS_DEFINITIONS)
+
+# Prompt sent at the start of every step conversation. The project context comes first and is marked
+# for prompt caching: it is identical across steps until the agent changes the project.
+STEP_CONTEXT_TEMPLATE = """
+<context name="project_structure">
+{directory_tree}
+</context>
+<context name="general_facts">
+{facts}
+</context>
+<context name="models" path="web/models.py">
+{models}
+</context>
+<context name="urls" path="web/urls.py">
+{urls}
+</context>
+"""
+STEP_TEMPLATE = "<step>{step}</step>\n"
+
+@functools.lru_cache(maxsize=None)
+def get_gemini_client(api_key: str):
+    """Gemini client shared by all agents, so they reuse one connection pool"""
+    # The Gemini SDK takes a while to import, so it is only loaded when the provider is used
+    from google import genai
+    return genai.Client(api_key=api_key)
+
+
+class RequestRateLimiter:
+    """Spaces out requests started from one event loop, so at most requests_per_minute start per minute"""
+
+    def __init__(self, requests_per_minute: int):
+        self.interval = 60.0 / requests_per_minute
+        self.next_request_time = 0.0
+
+    async def wait(self):
+        now = time.monotonic()
+        request_time = max(now, self.next_request_time)
+        # Reserve the slot before sleeping, so concurrent callers queue up behind each other
+        self.next_request_time = request_time + self.interval
+        if request_time > now:
+            await asyncio.sleep(request_time - now)
+
 
 class ImplementationAgent:
 
@@ -173,15 +270,19 @@ class ImplementationAgent:
         tools_definitions_override: list[dict] | None = None,
         tools_prompt_override: str | None = None,
         check_read_before_write: bool = True,
+        interactive: bool | None = None,
+        requests_per_minute: int | None = None,
     ):
         super().__init__()
         self.logger = logging.getLogger(__class__.__qualname__)
         self._system_prompt = system_prompt_override or IMPLEMENTATION_SYSTEM_PROMPT
-        self._tools_prompt = tools_prompt_override or tools_prompt(tools_definitions_override or TOOLS_DEFINITIONS)
+        self._tools_prompt = tools_prompt_override or (tools_prompt(tools_definitions_override) if tools_definitions_override else DEFAULT_TOOLS_PROMPT)
         self._tools_definitions = tools_definitions_override or TOOLS_DEFINITIONS
         self._check_read_before_write = check_read_before_write
+        self._anthropic_tools_schema: list[ToolParam] | None = None
+        self._gemini_tools_schema = None
 
-        self.logger.info(f"{Colors.BRIGHT_BLUE}[AGENT INIT]{Colors.END} Creating ImplementationAgent")
+        self.logger.info(f"{_TAG_AGENT_INIT} Creating ImplementationAgent")
         self.logger.info(f"  Project path: {project_path}")
 
         # Determine provider (env var or parameter)
@@ -189,10 +290,18 @@ class ImplementationAgent:
         self.logger.info(f"  Provider: {self.provider}")
 
         self.project_path = project_path
-        self.history = []
+        self._project_prefix = os.path.abspath(project_path).rstrip(os.sep) + os.sep  # Prepended to relative tool paths
+        self.history: deque[str] = deque(maxlen=HISTORY_MAX_ENTRIES)  # Recent file operations, oldest dropped first
         self.file_state_cache = {}  # Track read files for validation
-        self.always_yes = False  # Track if user chose "always yes"
+        self.context_files_cache = {}  # Context files included into every step prompt, by full path
+        self.directory_tree_cache: dict[tuple[str, int, int], str] = {}  # (root, max_depth, root mtime) -> tree
+        self.step_context_prompt: tuple[tuple[str, str, str], str] | None = None  # ((tree, models, urls), rendered prompt)
+        # Track if user chose "always yes"; without a terminal to answer, DEBUG=1 confirmations are skipped
+        self.always_yes = not (sys.stdin.isatty() if interactive is None else interactive)
+        self.verbose = context.verbose  # Log model text, prompts, edit diffs and snippets
         self.facts = facts
+        # Only the async conversations share the API between steps at once, so only they are rate limited
+        self.rate_limiter = RequestRateLimiter(requests_per_minute) if requests_per_minute else None
 
         # Initialize clients based on provider
         if self.provider == 'anthropic':
@@ -203,12 +312,16 @@ class ImplementationAgent:
             api_key = os.getenv('GEMINI_API_KEY')
             if not api_key:
                 raise ValueError("GEMINI_API_KEY environment variable required for Gemini")
-            self.gemini_client = genai.Client(api_key=api_key)
+            self.gemini_client = get_gemini_client(api_key)
             self.logger.info(f"  Gemini client initialized")
         else:
             raise ValueError(f"Unsupported provider: {self.provider}. Use 'anthropic' or 'gemini'")
 
-        self.logger.info(f"{Colors.BRIGHT_BLUE}[AGENT INIT]{Colors.END} Agent initialized successfully")
+        self.logger.info(f"{_TAG_AGENT_INIT} Agent initialized successfully")
+
+    def resolve_path(self, path: str) -> str:
+        """Resolve a tool path against the project directory, without os.path.join on every file operation"""
+        return path if os.path.isabs(path) else self._project_prefix + path
 
     def truncate_for_debug(self, content: str, max_length: int = 500) -> str:
         """Truncate content for debugging output"""
@@ -226,7 +339,13 @@ class ImplementationAgent:
             raise ValueError(f"Unsupported provider: {self.provider}")
 
     def get_anthropic_tools_schema(self) -> list[ToolParam]:
-        """Get the tools schema for the Anthropic API"""
+        """Get the tools schema for the Anthropic API, built once per agent"""
+        if self._anthropic_tools_schema is None:
+            self._anthropic_tools_schema = self.build_anthropic_tools_schema()
+        return self._anthropic_tools_schema
+
+    def build_anthropic_tools_schema(self) -> list[ToolParam]:
+        """Build the tools schema for the Anthropic API"""
         # Return only the schema fields needed for Anthropic API (exclude the 'prompt' field)
         return [
             ToolParam(
@@ -238,7 +357,14 @@ class ImplementationAgent:
         ]
 
     def get_gemini_tools_schema(self):
-        """Get the tools schema for the Gemini API"""
+        """Get the tools schema for the Gemini API, built once per agent"""
+        if self._gemini_tools_schema is None:
+            self._gemini_tools_schema = self.build_gemini_tools_schema()
+        return self._gemini_tools_schema
+
+    def build_gemini_tools_schema(self):
+        """Build the tools schema for the Gemini API"""
+        from google.genai import types as gemini_types
         function_declarations = []
 
         for tool in self._tools_definitions:
@@ -321,49 +447,47 @@ class ImplementationAgent:
 
     def list_files(self, path: str):
         """List files in a directory with proper validation and formatting"""
-        self.logger.info(f"{Colors.BRIGHT_YELLOW}[FILE OP]{Colors.END} Listing files in: {path}")
+        self.logger.info(f"{_TAG_FILE_OP} Listing files in: {path}")
 
-        full_path = os.path.join(self.project_path, path) if not os.path.isabs(path) else path
+        full_path = self.resolve_path(path)
         try:
             if not os.path.exists(full_path):
                 error_msg = f"Error: Directory not found or inaccessible: {path}"
-                self.logger.info(f"{Colors.BRIGHT_RED}[FILE OP ERROR]{Colors.END} {error_msg}")
+                self.logger.info(f"{_TAG_FILE_OP_ERROR} {error_msg}")
                 self.history.append(error_msg)
                 return {"success": False, "error": error_msg}
 
             if not os.path.isdir(full_path):
                 error_msg = f"Error: Path is not a directory: {path}"
-                self.logger.info(f"{Colors.BRIGHT_RED}[FILE OP ERROR]{Colors.END} {error_msg}")
+                self.logger.info(f"{_TAG_FILE_OP_ERROR} {error_msg}")
                 self.history.append(error_msg)
                 return {"success": False, "error": error_msg}
 
-            files = os.listdir(full_path)
+            # DirEntry caches the file type from the directory read, so there is no stat per entry
+            with os.scandir(full_path) as it:
+                files = list(it)
             entries = []
 
             if len(files) == 0:
                 result_msg = f"Directory {path} is empty."
-                self.logger.info(f"{Colors.BRIGHT_GREEN}[FILE OP]{Colors.END} {result_msg}")
+                self.logger.info(f"{_TAG_FILE_OP_DONE} {result_msg}")
                 self.history.append(f"Listed files in {path}: empty directory")
                 return {"success": True, "result": result_msg}
 
             for file in files:
-                if self.should_ignore_file(file):
+                if self.should_ignore_file(file.name):
                     continue
 
-                file_full_path = os.path.join(full_path, file)
-                
                 try:
-                    stats = os.stat(file_full_path)
-                    is_dir = os.path.isdir(file_full_path)
                     entries.append({
-                        'name': file,
-                        'is_directory': is_dir,
+                        'name': file.name,
+                        'is_directory': file.is_dir(),
                         # this will break caching, so if you need it take care of changing file sizes (e.g. logs)
-                        # 'size': 0 if is_dir else stats.st_size,
+                        # 'size': 0 if is_dir else file.stat().st_size,
                     })
                 except Exception as e:
                     # Log error internally but don't fail the whole listing
-                    self.logger.info(f"  Warning: Error accessing {file_full_path}: {e}")
+                    self.logger.info(f"  Warning: Error accessing {file.path}: {e}")
 
             # Sort entries (directories first, then alphabetically)
             entries.sort(key=lambda x: (not x['is_directory'], x['name'].lower()))
@@ -377,7 +501,7 @@ class ImplementationAgent:
             result_message = f"Directory listing for {path}:\n" + '\n'.join(directory_content)
             display_message = f"Listed {len(entries)} item(s)."
 
-            self.logger.info(f"{Colors.BRIGHT_GREEN}[FILE OP]{Colors.END} {display_message}")
+            self.logger.info(f"{_TAG_FILE_OP_DONE} {display_message}")
             self.history.append(f"Listed files in {path}: {len(entries)} items")
             
             return {
@@ -389,32 +513,41 @@ class ImplementationAgent:
 
         except Exception as e:
             error_msg = f"Error listing directory: {str(e)}"
-            self.logger.info(f"{Colors.BRIGHT_RED}[FILE OP ERROR]{Colors.END} {error_msg}")
+            self.logger.info(f"{_TAG_FILE_OP_ERROR} {error_msg}")
             self.history.append(error_msg)
             return {"success": False, "error": error_msg}
 
     def read_file(self, file_path: str, offset: int | None = None, limit: int | None = None):
         """Read contents of a file with optional offset and limit"""
-        full_path = os.path.join(self.project_path, file_path) if not os.path.isabs(file_path) else file_path
+        full_path = self.resolve_path(file_path)
 
         try:
-            with open(full_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # Normalize line endings to LF for consistent processing (Gemini provider)
-            if self.provider == 'gemini':
-                content = content.replace('\r\n', '\n')
-
-            # Store in cache for edit validation
-            file_stats = os.stat(full_path)
-            self.file_state_cache[file_path] = {
-                'content': content,
-                'timestamp': file_stats.st_mtime,
-                'size': file_stats.st_size
-            }
+            # Unchanged files are served from the cache, including their already formatted windows
+            if self.is_file_state_fresh(file_path):
+                cached_file = self.file_state_cache[file_path]
+            else:
+                # Read raw bytes and decode once, stat-ing the already open file
+                with open(full_path, 'rb') as f:
+                    file_stats = os.fstat(f.fileno())
+                    content = f.read().decode('utf-8')
+
+                # Normalize line endings to LF, as text mode reads did
+                if '\r' in content:
+                    content = content.replace('\r\n', '\n').replace('\r', '\n')
+
+                # Store in cache for edit validation
+                cached_file = {
+                    'content': content,
+                    'timestamp': file_stats.st_mtime,
+                    'size': file_stats.st_size
+                }
+                self.file_state_cache[file_path] = cached_file
 
-            # Format content using utility function
-            display_content, metadata = format_file_content(content, offset, limit)
+            # Format content using utility function, once per (offset, limit) window
+            formatted = cached_file.setdefault('formatted', {})
+            if (offset, limit) not in formatted:
+                formatted[(offset, limit)] = format_file_content(cached_file['content'], offset, limit)
+            display_content, metadata = formatted[(offset, limit)]
 
             # Create concise status message
             if offset is not None and limit is not None:
@@ -436,16 +569,36 @@ class ImplementationAgent:
 
         except Exception as e:
             error_msg = f"Error reading file {file_path}: {str(e)}"
-            self.logger.info(f"{Colors.BRIGHT_RED}[FILE OP ERROR]{Colors.END} {error_msg}")
+            self.logger.info(f"{_TAG_FILE_OP_ERROR} {error_msg}")
             self.history.append(error_msg)
             return ""
 
-    def count_occurrences(self, content: str, search_string: str) -> int:
-        """Count occurrences of search_string in content"""
-        return content.count(search_string)
-
-    def generate_diff(self, old_content: str, new_content: str, file_path: str) -> str:
-        """Generate a unified diff between old and new content"""
+    def read_context_file(self, file_path: str) -> str:
+        """Read a file included into every step prompt, reusing the content until the agent changes the file"""
+        full_path = os.path.normpath(os.path.join(self.project_path, file_path))
+        if full_path not in self.context_files_cache:
+            self.context_files_cache[full_path] = self.read_file(file_path)
+        return self.context_files_cache[full_path]
+
+    def invalidate_context_file(self, file_path: str):
+        """Drop a file from the context files cache after it has been changed"""
+        self.context_files_cache.pop(os.path.normpath(os.path.join(self.project_path, file_path)), None)
+
+    def count_occurrences(self, content: str, search_string: str, stop_after: int | None = None) -> int:
+        """Count occurrences of search_string in content, scanning no further than the stop_after-th one"""
+        if stop_after is None:
+            return content.count(search_string)
+
+        occurrences = 0
+        index = content.find(search_string)
+        while index >= 0 and occurrences < stop_after:
+            occurrences += 1
+            if occurrences < stop_after:
+                index = content.find(search_string, index + len(search_string))
+        return occurrences
+
+    def generate_diff(self, old_content: str, new_content: str, file_path: str) -> list[str]:
+        """Generate the lines of a unified diff between old and new content"""
         old_lines = old_content.splitlines(keepends=True)
         new_lines = new_content.splitlines(keepends=True)
 
@@ -457,12 +610,10 @@ class ImplementationAgent:
             lineterm=''
         )
 
-        return ''.join(diff)
+        return list(diff)
 
     def get_context_snippet(self, content: str, search_string: str, context_lines: int = 5) -> str:
         """Get a snippet showing the search_string with surrounding context"""
-        lines = content.splitlines()
-
         # For multi-line search strings, search for the first non-empty line
         search_lines = search_string.splitlines()
         search_target = None
@@ -475,119 +626,170 @@ class ImplementationAgent:
         if not search_target:
             return "Context not found - empty search string"
 
-        # Find the line containing the search_target
-        target_line = -1
-        for i, line in enumerate(lines):
-            if search_target in line:
-                target_line = i
-                break
+        # Normalize line breaks so that lines are numbered exactly as str.splitlines() would
+        content = OTHER_LINE_BREAKS.sub('\n', content)
 
-        if target_line == -1:
+        # Find the line containing the search_target without splitting the whole content into lines
+        target_offset = content.find(search_target)
+        if target_offset == -1:
             return f"Context not found - '{search_target[:50]}...' not found in file"
+        target_line = content.count('\n', 0, target_offset)
+
+        # Walk back to the start of the first context line and forward past the end of the last one
+        window_start = content.rfind('\n', 0, target_offset) + 1
+        for _ in range(context_lines):
+            if window_start == 0:
+                break
+            window_start = content.rfind('\n', 0, window_start - 1) + 1
+        window_end = target_offset
+        for _ in range(context_lines + 1):
+            window_end = content.find('\n', window_end)
+            if window_end == -1:
+                window_end = len(content)
+                break
+            window_end += 1
 
-        # Get context lines around the target
-        start_line = max(0, target_line - context_lines)
-        end_line = min(len(lines), target_line + context_lines + 1)
+        window = content[window_start:window_end]
+        if window.endswith('\n'):
+            window = window[:-1]
 
+        start_line = target_line - content.count('\n', window_start, target_offset)
         snippet_lines = []
-        for i in range(start_line, end_line):
+        for i, line in enumerate(window.split('\n'), start=start_line):
             prefix = ">" if i == target_line else " "
-            snippet_lines.append(f"{prefix} {i+1:4d}: {lines[i]}")
+            snippet_lines.append(f"{prefix} {i+1:4d}: {line}")
 
         return '\n'.join(snippet_lines)
 
     def write_file_simple(self, file_path: str, content: str) -> bool:
         """Write content to file"""
-        full_path = os.path.join(self.project_path, file_path) if not os.path.isabs(file_path) else file_path
+        full_path = self.resolve_path(file_path)
 
         try:
             dir_path = os.path.dirname(full_path)
             if not os.path.exists(dir_path):
                 os.makedirs(dir_path, exist_ok=True)
 
-            with open(full_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # Write next to the target and swap it in, so the file is never left half-written
+            fd, tmp_path = tempfile.mkstemp(dir=dir_path, prefix=f".{os.path.basename(full_path)}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                if os.path.exists(full_path):
+                    os.chmod(tmp_path, stat.S_IMODE(os.stat(full_path).st_mode))
+                os.replace(tmp_path, full_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
             return True
         except Exception as e:
             self.logger.info(f"  Error writing file: {e}")
             return False
 
+    def is_file_state_fresh(self, file_path: str) -> bool:
+        """Check whether the cached content of a file still matches the file on disk"""
+        cached_file = self.file_state_cache.get(file_path)
+        if cached_file is None:
+            return False
+
+        full_path = self.resolve_path(file_path)
+        try:
+            file_stats = os.stat(full_path)
+        except OSError:
+            return False
+        return file_stats.st_mtime == cached_file['timestamp'] and file_stats.st_size == cached_file['size']
+
     def edit_file(self, file_path: str, old_string: str, new_string: str, expected_replacements: int = 1):
         """Edit a file using exact string replacement with validation pipeline"""
-        self.logger.info(f"{Colors.BRIGHT_YELLOW}[FILE EDIT]{Colors.END} Editing file: {file_path}")
-        self.logger.info(f"  Old length: {len(old_string)}, New length: {len(new_string)}")
-        self.logger.info(f"  Expected replacements: {expected_replacements}")
+        self.logger.info(f"{_TAG_FILE_EDIT} Editing file: {file_path}")
+        if self.verbose:
+            self.logger.info(f"  Old length: {len(old_string)}, New length: {len(new_string)}")
+            self.logger.info(f"  Expected replacements: {expected_replacements}")
 
         # Validation 1: File must have been read first
         if self._check_read_before_write and file_path not in self.file_state_cache:
             error_msg = f"File must be read with read_file before editing: {file_path}"
-            self.logger.info(f"{Colors.BRIGHT_RED}[EDIT ERROR]{Colors.END} {error_msg}")
+            self.logger.info(f"{_TAG_EDIT_ERROR} {error_msg}")
             self.history.append(f"Edit failed: {error_msg}")
             return {"success": False, "error": error_msg}
 
-        if not self._check_read_before_write:
+        if not self._check_read_before_write and not self.is_file_state_fresh(file_path):
             self.read_file(file_path) # load into cache if the agent not obliged to read before editing
         cached_file = self.file_state_cache[file_path]
 
         # Validation 2: Cannot edit empty files
         if not cached_file['content'] or cached_file['content'].strip() == "":
             error_msg = "Cannot edit empty file. Use WriteTool to add content."
-            self.logger.info(f"{Colors.BRIGHT_RED}[EDIT ERROR]{Colors.END} {error_msg}")
+            self.logger.info(f"{_TAG_EDIT_ERROR} {error_msg}")
             self.history.append(f"Edit failed: {error_msg}")
             return {"success": False, "error": error_msg}
 
         # Validation 3: No-op check
         if old_string == new_string:
             error_msg = "old_string and new_string cannot be identical"
-            self.logger.info(f"{Colors.BRIGHT_RED}[EDIT ERROR]{Colors.END} {error_msg}")
+            self.logger.info(f"{_TAG_EDIT_ERROR} {error_msg}")
             self.history.append(f"Edit failed: {error_msg}")
             return {"success": False, "error": error_msg}
 
         # Validation 4: Check occurrences
         content = cached_file['content']
-        occurrences = self.count_occurrences(content, old_string)
+        # A single expected replacement only needs to rule out a second occurrence, not count all of them
+        stop_after = 2 if expected_replacements == 1 else None
+        occurrences = self.count_occurrences(content, old_string, stop_after)
 
         if occurrences == 0:
             error_msg = f"old_string not found in file: {file_path}"
-            self.logger.info(f"{Colors.BRIGHT_RED}[EDIT ERROR]{Colors.END} {error_msg}")
+            self.logger.info(f"{_TAG_EDIT_ERROR} {error_msg}")
             self.history.append(f"Edit failed: {error_msg}")
             return {"success": False, "error": error_msg}
 
         if occurrences != expected_replacements:
-            error_msg = f"Expected {expected_replacements} replacements but found {occurrences}"
-            self.logger.info(f"{Colors.BRIGHT_RED}[EDIT ERROR]{Colors.END} {error_msg}")
+            found = f"at least {occurrences}" if occurrences == stop_after else occurrences
+            error_msg = f"Expected {expected_replacements} replacements but found {found}"
+            self.logger.info(f"{_TAG_EDIT_ERROR} {error_msg}")
             self.history.append(f"Edit failed: {error_msg}")
             return {"success": False, "error": error_msg}
 
         # Perform replacement
-        self.logger.info(f"{Colors.BRIGHT_CYAN}[EDIT]{Colors.END} Performing replacement...")
+        if self.verbose:
+            self.logger.info(f"{_TAG_EDIT} Performing replacement...")
         new_content = content.replace(old_string, new_string, expected_replacements)
 
         # Generate diff
-        diff = self.generate_diff(content, new_content, file_path)
-        self.logger.info(f"{Colors.BRIGHT_CYAN}[EDIT]{Colors.END} Generated diff:")
-        self.logger.info(diff)
+        diff_lines = self.generate_diff(content, new_content, file_path)
+        diff = ''.join(diff_lines)
+        if self.verbose:
+            self.logger.info(f"{_TAG_EDIT} Generated diff:")
+            if len(diff_lines) > MAX_LOGGED_DIFF_LINES:
+                self.logger.info(''.join(diff_lines[:MAX_LOGGED_DIFF_LINES]))
+                self.logger.info(f"  ... diff truncated in log, {len(diff_lines) - MAX_LOGGED_DIFF_LINES} more lines")
+            else:
+                self.logger.info(diff)
 
         # Write file
         if not self.write_file_simple(file_path, new_content):
             error_msg = f"Failed to write file: {file_path}"
-            self.logger.info(f"{Colors.BRIGHT_RED}[EDIT ERROR]{Colors.END} {error_msg}")
+            self.logger.info(f"{_TAG_EDIT_ERROR} {error_msg}")
             self.history.append(f"Edit failed: {error_msg}")
             return {"success": False, "error": error_msg}
 
-        # Update cache
+        # Update cache; edits never change the directory structure, so the cached tree stays valid
+        self.invalidate_context_file(file_path)
+        full_path = self.resolve_path(file_path)
+        file_stats = os.stat(full_path)
         self.file_state_cache[file_path] = {
             'content': new_content,
-            'timestamp': 0,
-            'size': len(new_content)
+            'timestamp': file_stats.st_mtime,
+            'size': file_stats.st_size
         }
 
         # Generate context snippet
         snippet = self.get_context_snippet(new_content, new_string)
 
-        self.logger.info(f"{Colors.BRIGHT_GREEN}[EDIT]{Colors.END} File successfully edited")
-        self.logger.info(f"  Replacements made: {expected_replacements}")
-        self.logger.info(f"  Context snippet:\n{snippet}")
+        self.logger.info(f"{_TAG_EDIT_DONE} File successfully edited")
+        if self.verbose:
+            self.logger.info(f"  Replacements made: {expected_replacements}")
+            self.logger.info(f"  Context snippet:\n{snippet}")
 
         self.history.append(f"Edited file: {file_path} ({expected_replacements} replacements)")
 
@@ -600,54 +802,67 @@ class ImplementationAgent:
 
     def write_file(self, file_path: str, content: str):
         """Write content to a new file"""
-        self.logger.info(f"{Colors.BRIGHT_YELLOW}[FILE OP]{Colors.END} Writing new file: {file_path}")
-        self.logger.info(f"  Content length: {len(content)} characters, {len(content.splitlines())} lines")
-        full_path = os.path.join(self.project_path, file_path) if not os.path.isabs(file_path) else file_path
+        self.logger.info(f"{_TAG_FILE_OP} Writing new file: {file_path}")
+        if self.verbose:
+            self.logger.info(f"  Content length: {len(content)} characters")
+        full_path = self.resolve_path(file_path)
 
         try:
             dir_path = os.path.dirname(full_path)
             if not os.path.exists(dir_path):
-                self.logger.info(f"  Creating directory: {dir_path}")
+                if self.verbose:
+                    self.logger.info(f"  Creating directory: {dir_path}")
                 os.makedirs(dir_path, exist_ok=True)
 
             with open(full_path, 'w', encoding='utf-8') as f:
                 f.write(content)
-            self.logger.info(f"{Colors.BRIGHT_GREEN}[FILE OP]{Colors.END} Successfully wrote file")
+            self.logger.info(f"{_TAG_FILE_OP_DONE} Successfully wrote file")
+            # The stat may not change on a same-size rewrite, so the cached content is replaced, not left to go stale
+            file_stats = os.stat(full_path)
+            self.file_state_cache[file_path] = {
+                'content': content.replace('\r\n', '\n').replace('\r', '\n') if '\r' in content else content,
+                'timestamp': file_stats.st_mtime,
+                'size': file_stats.st_size
+            }
+            self.invalidate_context_file(file_path)
+            self.invalidate_directory_tree(file_path)
             self.history.append(f"Created file: {file_path}")
             return True
         except Exception as e:
             error_msg = f"Error writing file {file_path}: {str(e)}"
-            self.logger.info(f"{Colors.BRIGHT_RED}[FILE OP ERROR]{Colors.END} {error_msg}")
+            self.logger.info(f"{_TAG_FILE_OP_ERROR} {error_msg}")
             self.history.append(error_msg)
             return False
 
+    def needs_confirmation(self) -> bool:
+        """Tool calls are confirmed interactively only with DEBUG=1, until the user chooses to always confirm"""
+        return os.getenv('DEBUG', '0') == '1' and not self.always_yes
+
     def execute_tool_call(self, tool_name: str, tool_input: dict):
         """Execute a tool call and return the result"""
         # Skip confirmation if always_yes is set or DEBUG is not enabled
-        debug_mode = os.getenv('DEBUG', '0') == '1'
-        
-        if self.always_yes or not debug_mode:
+        if not self.needs_confirmation():
             # Silent execution for confirmed operations or when DEBUG is disabled
             pass
         else:
             # Ask for user confirmation only when DEBUG=1
-            self.logger.info(f"{Colors.BRIGHT_YELLOW}[CONFIRMATION]{Colors.END} Do you want to execute this tool call?")
+            self.logger.info(f"{_TAG_CONFIRMATION} Do you want to execute this tool call?")
             self.logger.info(f"  Tool: {tool_name}")
             self.logger.info(f"  Parameters: {tool_input}")
 
             while True:
-                response = input(f"{Colors.BRIGHT_CYAN}[INPUT]{Colors.END} Proceed? (y/n/a): ").lower().strip()
+                response = input(f"{_TAG_INPUT} Proceed? (y/n/a): ").lower().strip()
                 if response in ['y', 'yes']:
                     break
                 elif response in ['a', 'always']:
-                    self.logger.info(f"{Colors.BRIGHT_GREEN}[ALWAYS YES]{Colors.END} Enabling always yes mode...")
+                    self.logger.info(f"{_TAG_ALWAYS_YES} Enabling always yes mode...")
                     self.always_yes = True
                     break
                 elif response in ['n', 'no']:
-                    self.logger.info(f"{Colors.BRIGHT_RED}[EXIT]{Colors.END} Exiting program...")
+                    self.logger.info(f"{_TAG_EXIT} Exiting program...")
                     exit(0)
                 else:
-                    self.logger.info(f"{Colors.BRIGHT_RED}[INVALID]{Colors.END} Please enter 'y' (yes), 'n' (no/exit), or 'a' (always yes)")
+                    self.logger.info(f"{_TAG_INVALID} Please enter 'y' (yes), 'n' (no/exit), or 'a' (always yes)")
 
         try:
             if tool_name == "list_files":
@@ -675,36 +890,63 @@ class ImplementationAgent:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def get_directory_tree(self, path: str, prefix: str = "", max_depth: int = 3, current_depth: int = 0):
+    def get_directory_tree(self, path: str, max_depth: int = 3) -> str:
+        """Generate a directory tree structure, reusing the previous result while the tree is unchanged"""
+        try:
+            cache_key = (os.path.abspath(path), max_depth, os.stat(path).st_mtime_ns)
+        except OSError:
+            return self.build_directory_tree(path, max_depth=max_depth)
+
+        if cache_key not in self.directory_tree_cache:
+            self.directory_tree_cache[cache_key] = self.build_directory_tree(path, max_depth=max_depth)
+        return self.directory_tree_cache[cache_key]
+
+    def invalidate_directory_tree(self, file_path: str):
+        """Drop cached trees containing file_path: changes in subdirectories don't update the root mtime"""
+        full_path = os.path.abspath(os.path.join(self.project_path, file_path))
+        for cache_key in list(self.directory_tree_cache):
+            root = cache_key[0]
+            if full_path == root or full_path.startswith(root.rstrip(os.sep) + os.sep):
+                del self.directory_tree_cache[cache_key]
+
+    def build_directory_tree(self, path: str, max_depth: int = 3) -> str:
         """Generate a directory tree structure"""
+        lines: list[str] = []
+        self.append_directory_tree(lines, path, "", max_depth, 0)
+        return ''.join(lines)
+
+    # Tree branches: (entry prefix, prefix extension for the entry's children)
+    TREE_BRANCH = ('├── ', '│   ')
+    TREE_LAST_BRANCH = ('└── ', '    ')
+
+    def append_directory_tree(self, lines: list[str], path: str, prefix: str, max_depth: int, current_depth: int):
+        """Append the tree lines of path to lines, recursing into subdirectories up to max_depth"""
         if current_depth >= max_depth:
-            return ""
+            return
 
-        tree = ""
         try:
-            items = sorted(os.listdir(path))
-            filtered_items = []
-            for item in items:
-                if item.startswith('.') or self.should_ignore_file(item):
-                    continue
-                filtered_items.append(item)
-            
-            for i, item in enumerate(filtered_items):
-                item_path = os.path.join(path, item)
-                is_last = i == len(filtered_items) - 1
-
-                if os.path.isdir(item_path):
-                    tree += f"{prefix}{'└── ' if is_last else '├── '}{item}/\n"
-                    extension = "    " if is_last else "│   "
-                    tree += self.get_directory_tree(item_path, prefix + extension, max_depth, current_depth + 1)
+            # DirEntry caches the file type from the directory read, so no extra stat per entry is needed
+            # Filter before sorting, so hidden and ignored entries are never sorted
+            with os.scandir(path) as it:
+                filtered_entries = [
+                    entry for entry in it
+                    if not entry.name.startswith('.') and not self.should_ignore_file(entry.name)
+                ]
+            filtered_entries.sort(key=lambda entry: entry.name)
+
+            last_index = len(filtered_entries) - 1
+            for i, entry in enumerate(filtered_entries):
+                branch, extension = self.TREE_LAST_BRANCH if i == last_index else self.TREE_BRANCH
+
+                if entry.is_dir(follow_symlinks=False):
+                    lines.append(f"{prefix}{branch}{entry.name}/\n")
+                    self.append_directory_tree(lines, entry.path, prefix + extension, max_depth, current_depth + 1)
                 else:
-                    tree += f"{prefix}{'└── ' if is_last else '├── '}{item}\n"
+                    lines.append(f"{prefix}{branch}{entry.name}\n")
         except PermissionError:
-            tree += f"{prefix}[Permission Denied]\n"
+            lines.append(f"{prefix}[Permission Denied]\n")
         except Exception as e:
-            tree += f"{prefix}[Error: {str(e)}]\n"
-
-        return tree
+            lines.append(f"{prefix}[Error: {str(e)}]\n")
 
     def retry_with_backoff(self, func, max_retries=5, base_delay=1.0, max_delay=60.0):
         """Retry a function with exponential backoff for Anthropic API rate limiting/overload"""
@@ -716,7 +958,7 @@ class ImplementationAgent:
                     if attempt < max_retries - 1:  # Don't sleep on last attempt
                         # Calculate delay with exponential backoff and jitter
                         delay = min(base_delay * (2 ** attempt) + random.uniform(0, 1), max_delay)
-                        self.logger.info(f"{Colors.BRIGHT_YELLOW}[RETRY]{Colors.END} API overloaded (attempt {attempt + 1}/{max_retries}), retrying in {delay:.2f}s...")
+                        self.logger.info(f"{_TAG_RETRY} API overloaded (attempt {attempt + 1}/{max_retries}), retrying in {delay:.2f}s...")
                         time.sleep(delay)
                         continue
                 # Re-raise non-retryable errors or if we've exhausted retries
@@ -739,6 +981,22 @@ class ImplementationAgent:
                 return True
         return False
 
+    async def retry_with_backoff_async(self, func, max_retries=5, base_delay=1.0, max_delay=60.0):
+        """Async counterpart of retry_with_backoff, awaits the coroutine returned by func"""
+        for attempt in range(max_retries):
+            try:
+                return await func()
+            except Exception as e:
+                if self.should_retry(e):
+                    if attempt < max_retries - 1:  # Don't sleep on last attempt
+                        delay = min(base_delay * (2 ** attempt) + random.uniform(0, 1), max_delay)
+                        self.logger.info(f"{_TAG_RETRY} API overloaded (attempt {attempt + 1}/{max_retries}), retrying in {delay:.2f}s...")
+                        await asyncio.sleep(delay)
+                        continue
+                raise
+
+        raise Exception(f"Max retries ({max_retries}) exceeded for API call")
+
     def run_streaming_conversation(self, system_prompt: str, messages: list) -> dict:
         """Run a conversation with the selected provider until completion"""
         if self.provider == 'anthropic':
@@ -748,61 +1006,167 @@ class ImplementationAgent:
         else:
             raise ValueError(f"Unsupported provider: {self.provider}")
 
+    async def run_streaming_conversation_async(self, system_prompt: str, messages: list) -> dict:
+        """Async version of run_streaming_conversation, allows running several conversations concurrently"""
+        if self.provider == 'anthropic':
+            return await self.run_anthropic_conversation_async(system_prompt, messages)
+        elif self.provider == 'gemini':
+            return await asyncio.to_thread(self.run_gemini_conversation, messages)
+        else:
+            raise ValueError(f"Unsupported provider: {self.provider}")
+
+    def log_anthropic_request(self, messages: list):
+        self.logger.info(f"{_TAG_AI_REQUEST} Sending request to Claude with {len(messages)} messages:")
+        # Stringifying the whole history on every turn is costly, so it is only done in verbose mode
+        if self.verbose:
+            for i, message in enumerate(messages):
+                content_preview = self.truncate_for_debug(str(message['content']))
+                self.logger.info(f"  Message {i+1} ({message['role']}): {content_preview}")
+        self.logger.info('')
+
+        self.logger.info(f"{_TAG_AI_STREAMING_START} Starting streaming response...")
+
+    def log_anthropic_response(self, final_message, api_call_duration: float):
+        self.logger.info(f"{_TAG_AI_RESPONSE} Streaming completed")
+        self.logger.info(f"  Input tokens: {final_message.usage.input_tokens}")
+        self.logger.info(f"  Output tokens: {final_message.usage.output_tokens}")
+        self.logger.info(f"  Cache read/write input tokens: {final_message.usage.cache_read_input_tokens or 0}/{final_message.usage.cache_creation_input_tokens or 0}")
+        self.logger.info(f"  API call duration: {api_call_duration:.2f}s")
+
+    def tool_call_span_name(self, tool_call) -> str:
+        span_name = f"Implementing \"{tool_call.name}\" tool call"
+        file_path = cast(dict, tool_call.input).get("path")
+        if file_path:
+            span_name = span_name + f", file: {file_path}"
+        return span_name
+
+    def anthropic_system_blocks(self, system_prompt: str) -> list[dict]:
+        """System prompt followed by the tools prompt, marked for prompt caching"""
+        return [{"type": "text", "text": system_prompt + "\n" + self._tools_prompt, "cache_control": {"type": "ephemeral"}}]
+
+    def move_cache_breakpoint(self, messages: list):
+        """
+        Mark the end of the conversation for prompt caching, so the next turn reads the whole
+        conversation so far from the cache, and unmark the end of the previous turn.
+
+        Together with the system prompt and the step context, this keeps 3 of the 4 allowed breakpoints.
+        """
+        last_message = messages[-1]
+        if isinstance(last_message['content'], str):
+            last_message['content'] = [{"type": "text", "text": last_message['content']}]
+        last_message['content'][-1]["cache_control"] = {"type": "ephemeral"}
+
+        # The previous turn's user message is two messages back, before the assistant's reply
+        if len(messages) >= 3 and isinstance(messages[-3]['content'], list):
+            messages[-3]['content'][-1].pop("cache_control", None)
+
+    def run_anthropic_tool_call(self, tool_call) -> dict:
+        """Execute a single tool_use block and build the tool_result for it"""
+        # Cast tool_call.input to dict for type safety
+        tool_input = cast(dict, tool_call.input)
+        result = self.execute_tool_call(tool_call.name, tool_input)
+
+        # Only show errors or non-read operations in detail
+        if not result['success'] or tool_call.name != 'read_file':
+            self.logger.info(f"{_TAG_TOOL_RESULT if result['success'] else _TAG_TOOL_RESULT_ERROR} {tool_call.name}: {'Success' if result['success'] else 'Error'}")
+            if not result['success']:
+                self.logger.info(f"  Result: {self.truncate_for_debug(json.dumps(result))}")
+
+        return {
+            "type": "tool_result",
+            "tool_use_id": tool_call.id,
+            "content": json.dumps(result)
+        }
+
+    def run_anthropic_tool_calls(self, tool_calls: list, spans: bool = True) -> list[dict]:
+        """
+        Execute the tool calls of one assistant turn, returning their tool_results in order.
+
+        Runs of consecutive read-only calls are executed concurrently; a writing call waits for every call
+        before it, and every call after it waits for the write.
+        """
+        tool_results = []
+        i = 0
+        while i < len(tool_calls):
+            j = i
+            while j < len(tool_calls) and tool_calls[j].name in READ_ONLY_TOOLS:
+                j += 1
+
+            # Confirmation prompts need the calls one at a time
+            if j - i > 1 and not self.needs_confirmation():
+                with ThreadPoolExecutor(max_workers=min(j - i, MAX_CONCURRENT_TOOL_CALLS)) as executor:
+                    tool_results.extend(executor.map(self.run_anthropic_tool_call, tool_calls[i:j]))
+                i = j
+                continue
+
+            tool_call = tool_calls[i]
+            if spans:
+                with LoggingUtil.Span(self.tool_call_span_name(tool_call)):
+                    tool_results.append(self.run_anthropic_tool_call(tool_call))
+            else:
+                tool_results.append(self.run_anthropic_tool_call(tool_call))
+            i += 1
+
+        return tool_results
+
     def run_anthropic_conversation(self, system_prompt: str, messages: list) -> dict:
         """Run a streaming conversation with Claude until completion"""
+        input_tokens = 0
         output_tokens = 0
         total_api_duration = 0.0
 
+        # Request parameters that stay the same for every turn
+        system = self.anthropic_system_blocks(system_prompt)
+        tools = self.get_anthropic_tools_schema()
+
         # Continue conversation until no more tool calls
         iteration_count = 0
         while True:
             iteration_count += 1
             with LoggingUtil.Span(f"Conversation iteration #{iteration_count} ({len(messages)} messages)"):
-                self.logger.info(f"{Colors.BRIGHT_MAGENTA}[AI REQUEST]{Colors.END} Sending request to Claude with {len(messages)} messages:")
-                for i, message in enumerate(messages):
-                    content_preview = self.truncate_for_debug(str(message['content']))
-                    self.logger.info(f"  Message {i+1} ({message['role']}): {content_preview}")
-                self.logger.info('')
-
-                self.logger.info(f"{Colors.BRIGHT_MAGENTA}[AI STREAMING]{Colors.END} Starting streaming response...")
+                self.log_anthropic_request(messages)
+                self.move_cache_breakpoint(messages)
 
                 # Track API call duration
                 api_start_time = time.time()
-
-                full_system_prompt = system_prompt + "\n" + self._tools_prompt
+                max_tokens = MAX_OUTPUT_TOKENS
 
                 # Use the streaming helper for cleaner code with retry logic
                 def make_streaming_request():
                     with self.anthropic_client.stream(
                         model="claude-sonnet-4-20250514",
-                        max_tokens=10000,
+                        max_tokens=max_tokens,
                         temperature=0,
-                        system=full_system_prompt,
-                        tools=self.get_anthropic_tools_schema(),
+                        system=system,
+                        tools=tools,
                         messages=messages
                     ) as stream:
-                        self.logger.info(f"{Colors.BRIGHT_GREEN}[AI STREAMING]{Colors.END} Receiving response:")
-
-                        # Stream text as it arrives
-                        for text in stream.text_stream:
-                            self.logger.info(f"{Colors.GREY}{text}{Colors.END}")
-
-                        self.logger.info('')  # New line after streaming text
+                        # Collect streamed text and log it once, not per chunk
+                        text_parts = [text for text in stream.text_stream]
+                        if self.verbose:
+                            self.logger.info(f"{_TAG_AI_STREAMING} Received response:")
+                            self.logger.info(f"{Colors.GREY}{''.join(text_parts)}{Colors.END}")
+                            self.logger.info('')  # New line after streaming text
 
                         # Get the final message with all content blocks
                         return stream.get_final_message()
 
                 with LoggingUtil.Span(f"Making streaming request"):
                     final_message = self.retry_with_backoff(make_streaming_request)
+                    input_tokens += final_message.usage.input_tokens
+                    output_tokens += final_message.usage.output_tokens
+                    if final_message.stop_reason == "max_tokens":
+                        self.logger.info(f"{_TAG_RETRY} Response hit the {max_tokens} output tokens limit, retrying with {MAX_OUTPUT_TOKENS_RETRY}")
+                        max_tokens = MAX_OUTPUT_TOKENS_RETRY
+                        final_message = self.retry_with_backoff(make_streaming_request)
+                        input_tokens += final_message.usage.input_tokens
+                        output_tokens += final_message.usage.output_tokens
 
                 api_end_time = time.time()
                 api_call_duration = api_end_time - api_start_time
                 total_api_duration += api_call_duration
 
-                self.logger.info(f"{Colors.BRIGHT_MAGENTA}[AI RESPONSE]{Colors.END} Streaming completed")
-                self.logger.info(f"  Output tokens: {final_message.usage.output_tokens}")
-                self.logger.info(f"  API call duration: {api_call_duration:.2f}s")
-                output_tokens += final_message.usage.output_tokens
+                self.log_anthropic_response(final_message, api_call_duration)
 
                 # Add assistant message to conversation
                 messages.append({
@@ -814,36 +1178,13 @@ class ImplementationAgent:
                 tool_calls = [block for block in final_message.content if hasattr(block, 'type') and block.type == "tool_use"]
 
                 if not tool_calls:
-                    self.logger.info(f"{Colors.BRIGHT_GREEN}[CONVERSATION]{Colors.END} No more tool calls, conversation complete")
+                    self.logger.info(f"{_TAG_CONVERSATION} No more tool calls, conversation complete")
                     break
 
-                self.logger.info(f"{Colors.BRIGHT_CYAN}[TOOL EXECUTION]{Colors.END} Processing {len(tool_calls)} tool calls")
+                self.logger.info(f"{_TAG_TOOL_EXECUTION} Processing {len(tool_calls)} tool calls")
 
                 # Execute tool calls and collect results
-                tool_results = []
-                for tool_call in tool_calls:
-                    # Cast tool_call.input to dict for type safety
-                    tool_input = cast(dict, tool_call.input)
-                    span_name = f"Implementing \"{tool_call.name}\" tool call"
-                    file_path = tool_input.get("path")
-                    if file_path:
-                        span_name = span_name + f", file: {file_path}"
-
-                    with LoggingUtil.Span(span_name):
-                        result = self.execute_tool_call(tool_call.name, tool_input)
-
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": tool_call.id,
-                        "content": json.dumps(result)
-                    })
-
-                    # Only show errors or non-read operations in detail
-                    if not result['success'] or tool_call.name != 'read_file':
-                        result_preview = self.truncate_for_debug(json.dumps(result))
-                        self.logger.info(f"{Colors.BRIGHT_GREEN if result['success'] else Colors.BRIGHT_RED}[TOOL RESULT]{Colors.END} {tool_call.name}: {'Success' if result['success'] else 'Error'}")
-                        if not result['success']:
-                            self.logger.info(f"  Result: {result_preview}")
+                tool_results = self.run_anthropic_tool_calls(tool_calls)
 
                 # Add tool results to conversation
                 messages.append({
@@ -853,12 +1194,98 @@ class ImplementationAgent:
 
         return {
             "messages": messages,
+            "total_input_tokens": input_tokens,
+            "total_output_tokens": output_tokens,
+            "total_api_duration": total_api_duration
+        }
+
+    async def run_anthropic_conversation_async(self, system_prompt: str, messages: list) -> dict:
+        """
+        Async version of run_anthropic_conversation.
+
+        Does not open logging spans: spans are tracked per thread, and interleaving
+        coroutines would corrupt their nesting.
+        """
+        input_tokens = 0
+        output_tokens = 0
+        total_api_duration = 0.0
+
+        system = self.anthropic_system_blocks(system_prompt)
+        tools = self.get_anthropic_tools_schema()
+
+        while True:
+            self.log_anthropic_request(messages)
+            self.move_cache_breakpoint(messages)
+
+            api_start_time = time.time()
+            max_tokens = MAX_OUTPUT_TOKENS
+
+            async def make_streaming_request():
+                if self.rate_limiter:
+                    await self.rate_limiter.wait()
+                async with self.anthropic_client.async_stream(
+                    model="claude-sonnet-4-20250514",
+                    max_tokens=max_tokens,
+                    temperature=0,
+                    system=system,
+                    tools=tools,
+                    messages=messages
+                ) as stream:
+                    text_parts = [text async for text in stream.text_stream]
+                    if self.verbose:
+                        self.logger.info(f"{_TAG_AI_STREAMING} Received response:")
+                        self.logger.info(f"{Colors.GREY}{''.join(text_parts)}{Colors.END}")
+                        self.logger.info('')
+
+                    return await stream.get_final_message()
+
+            final_message = await self.retry_with_backoff_async(make_streaming_request)
+            input_tokens += final_message.usage.input_tokens
+            output_tokens += final_message.usage.output_tokens
+            if final_message.stop_reason == "max_tokens":
+                self.logger.info(f"{_TAG_RETRY} Response hit the {max_tokens} output tokens limit, retrying with {MAX_OUTPUT_TOKENS_RETRY}")
+                max_tokens = MAX_OUTPUT_TOKENS_RETRY
+                final_message = await self.retry_with_backoff_async(make_streaming_request)
+                input_tokens += final_message.usage.input_tokens
+                output_tokens += final_message.usage.output_tokens
+
+            api_call_duration = time.time() - api_start_time
+            total_api_duration += api_call_duration
+
+            self.log_anthropic_response(final_message, api_call_duration)
+
+            messages.append({
+                "role": "assistant",
+                "content": final_message.content
+            })
+
+            tool_calls = [block for block in final_message.content if hasattr(block, 'type') and block.type == "tool_use"]
+
+            if not tool_calls:
+                self.logger.info(f"{_TAG_CONVERSATION} No more tool calls, conversation complete")
+                break
+
+            self.logger.info(f"{_TAG_TOOL_EXECUTION} Processing {len(tool_calls)} tool calls")
+
+            # Tools do blocking file and subprocess work, which would otherwise stall the other conversations
+            tool_results = await asyncio.to_thread(self.run_anthropic_tool_calls, tool_calls, spans=False)
+
+            messages.append({
+                "role": "user",
+                "content": tool_results
+            })
+
+        return {
+            "messages": messages,
+            "total_input_tokens": input_tokens,
             "total_output_tokens": output_tokens,
             "total_api_duration": total_api_duration
         }
 
     def run_gemini_conversation(self, messages: list) -> dict:
         """Run a conversation with Gemini until completion"""
+        from google.genai import types as gemini_types
+        input_tokens = 0
         output_tokens = 0
         total_api_duration = 0.0
         gemini_contents = []
@@ -871,21 +1298,30 @@ class ImplementationAgent:
                         role='user',
                         parts=[gemini_types.Part.from_text(text=message['content'])]
                     ))
-                # Handle tool results
+                # Handle text blocks and tool results
                 elif isinstance(message['content'], list):
+                    text_parts = []
                     tool_parts = []
                     for content_item in message['content']:
-                        if content_item.get('type') == 'tool_result':
+                        if content_item.get('type') == 'text':
+                            text_parts.append(gemini_types.Part.from_text(text=content_item['text']))
+                        elif content_item.get('type') == 'tool_result':
                             tool_parts.append(gemini_types.Part.from_function_response(
                                 name=content_item.get('tool_use_id', 'unknown'),
                                 response=json.loads(content_item['content'])
                             ))
+                    if text_parts:
+                        gemini_contents.append(gemini_types.Content(role='user', parts=text_parts))
                     if tool_parts:
                         gemini_contents.append(gemini_types.Content(role='tool', parts=tool_parts))
 
+        config = gemini_types.GenerateContentConfig(
+            tools=self.get_gemini_tools_schema(),
+        )
+
         # Continue conversation until no more tool calls
         while True:
-            self.logger.info(f"{Colors.BRIGHT_MAGENTA}[AI REQUEST]{Colors.END} Sending request to Gemini with {len(gemini_contents)} messages")
+            self.logger.info(f"{_TAG_AI_REQUEST} Sending request to Gemini with {len(gemini_contents)} messages")
 
             try:
                 # Track API call duration
@@ -894,17 +1330,18 @@ class ImplementationAgent:
                 response = self.gemini_client.models.generate_content(
                     model='gemini-2.5-flash',
                     contents=gemini_contents,
-                    config=gemini_types.GenerateContentConfig(
-                        tools=self.get_gemini_tools_schema(),
-                    ),
+                    config=config,
                 )
 
                 api_end_time = time.time()
                 api_call_duration = api_end_time - api_start_time
                 total_api_duration += api_call_duration
 
-                self.logger.info(f"{Colors.BRIGHT_GREEN}[AI RESPONSE]{Colors.END} Gemini response received")
+                self.logger.info(f"{_TAG_AI_RESPONSE_GEMINI} Gemini response received")
                 self.logger.info(f"  API call duration: {api_call_duration:.2f}s")
+                if response.usage_metadata:
+                    input_tokens += response.usage_metadata.prompt_token_count or 0
+                    output_tokens += response.usage_metadata.candidates_token_count or 0
 
                 # Add assistant response to conversation
                 if response.candidates and response.candidates[0].content:
@@ -918,22 +1355,23 @@ class ImplementationAgent:
                     response.candidates[0].content and 
                     response.candidates[0].content.parts):
                     for part in response.candidates[0].content.parts:
-                        self.logger.info(f"Part: {part}")
+                        if self.verbose:
+                            self.logger.info(f"Part: {part}")
                         if hasattr(part, 'function_call') and part.function_call:
                             function_calls.append(part)
                         elif hasattr(part, 'text') and part.text:
                             text_parts.append(part.text)
 
                 # Print any text content
-                if text_parts:
+                if text_parts and self.verbose:
                     combined_text = ''.join(text_parts)
                     self.logger.info(f"{Colors.GREY}{combined_text}{Colors.END}")
 
                 if not function_calls:
-                    self.logger.info(f"{Colors.BRIGHT_GREEN}[CONVERSATION]{Colors.END} No more function calls, conversation complete")
+                    self.logger.info(f"{_TAG_CONVERSATION} No more function calls, conversation complete")
                     break
 
-                self.logger.info(f"{Colors.BRIGHT_CYAN}[TOOL EXECUTION]{Colors.END} Processing {len(function_calls)} function calls")
+                self.logger.info(f"{_TAG_TOOL_EXECUTION} Processing {len(function_calls)} function calls")
 
                 # Execute function calls and collect results
                 function_response_parts = []
@@ -954,75 +1392,192 @@ class ImplementationAgent:
 
                     # Only show errors or non-read operations in detail
                     if not result['success'] or function_call.name != 'read_file':
-                        result_preview = self.truncate_for_debug(json.dumps(result))
-                        self.logger.info(f"{Colors.BRIGHT_GREEN if result['success'] else Colors.BRIGHT_RED}[TOOL RESULT]{Colors.END} {function_call.name}: {'Success' if result['success'] else 'Error'}")
+                        self.logger.info(f"{_TAG_TOOL_RESULT if result['success'] else _TAG_TOOL_RESULT_ERROR} {function_call.name}: {'Success' if result['success'] else 'Error'}")
                         if not result['success']:
-                            self.logger.info(f"  Result: {result_preview}")
+                            self.logger.info(f"  Result: {self.truncate_for_debug(json.dumps(result))}")
 
                 # Add function responses to conversation
                 if function_response_parts:
                     gemini_contents.append(gemini_types.Content(role='tool', parts=function_response_parts))
 
             except Exception as e:
-                self.logger.info(f"{Colors.BRIGHT_RED}[ERROR]{Colors.END} Gemini API error: {e}")
+                self.logger.info(f"{_TAG_ERROR} Gemini API error: {e}")
                 break
 
         return {
             "messages": gemini_contents,
+            "total_input_tokens": input_tokens,
             "total_output_tokens": output_tokens,
             "total_api_duration": total_api_duration
         }
 
-    def implement_step(self, step_text: str):
-        """Implement a step by processing its components (goals, knowledge, plans, screens, etc.)"""
-        self.logger.info(f"{Colors.BRIGHT_CYAN}[AGENT]{Colors.END} Starting step implementation")
-        self.logger.info(f"  Step text length: {len(step_text)} characters")
-        self.logger.info(f"  Step preview: {step_text[:100]}...")
+    def build_step_messages(self, step_text: str) -> list:
+        """Gather the project context for a step and build the initial conversation messages"""
+        self.logger.info(f"{_TAG_AGENT} Starting step implementation")
+        if self.verbose:
+            self.logger.info(f"  Step text length: {len(step_text)} characters")
+            self.logger.info(f"  Step preview: {step_text[:100]}...")
 
         # Read current models and views for context
-        self.logger.info(f"{Colors.BRIGHT_CYAN}[AGENT]{Colors.END} Gathering context files")
-        models_content = self.read_file("web/models.py")
-        views_content = self.read_file("web/views.py")
-        urls_content = self.read_file("web/urls.py")
+        if self.verbose:
+            self.logger.info(f"{_TAG_AGENT} Gathering context files")
+        models_content = self.read_context_file("web/models.py")
+        views_content = self.read_context_file("web/views.py")
+        urls_content = self.read_context_file("web/urls.py")
 
         # Get directory structure
-        self.logger.info(f"{Colors.BRIGHT_CYAN}[AGENT]{Colors.END} Generating directory tree")
         directory_tree = self.get_directory_tree(self.project_path)
-        self.logger.info(f"  Directory tree length: {len(directory_tree)} characters")
-
-        # Create prompt for implementation
-        prompt = f"""
-<context name="project_structure">
-{directory_tree}
-</context>
-<context name="general_facts">
-{self.facts}
-</context>
-<context name="models" path="web/models.py">
-{models_content}
-</context>
-<context name="urls" path="web/urls.py">
-{urls_content}
-</context>
-<step>{step_text}</step>
-"""
-
-        self.logger.info(f"{Colors.BRIGHT_CYAN}[PROMPT]{Colors.END} Generated prompt:")
-        self.logger.info(self.truncate_for_debug(prompt))
-        self.logger.info(f"{Colors.BRIGHT_MAGENTA}[AI REQUEST]{Colors.END} Sending request to Claude with tools")
+        if self.verbose:
+            self.logger.info(f"{_TAG_AGENT} Generated directory tree")
+            self.logger.info(f"  Directory tree length: {len(directory_tree)} characters")
+
+        # Create prompt for implementation. The inputs come from caches, so while the project is unchanged
+        # they are the same objects and the comparison below short-circuits on identity
+        context_inputs = (directory_tree, models_content, urls_content)
+        if self.step_context_prompt is None or self.step_context_prompt[0] != context_inputs:
+            self.step_context_prompt = (context_inputs, STEP_CONTEXT_TEMPLATE.format_map({
+                "directory_tree": directory_tree,
+                "facts": self.facts,
+                "models": models_content,
+                "urls": urls_content,
+            }))
+        context_prompt = self.step_context_prompt[1]
+        step_prompt = STEP_TEMPLATE.format_map({"step": step_text})
+
+        if self.verbose:
+            self.logger.info(f"{_TAG_PROMPT} Generated prompt:")
+            self.logger.info(self.truncate_for_debug(context_prompt + step_prompt))
+        self.logger.info(f"{_TAG_AI_REQUEST} Sending request to Claude with tools")
+
+        # Input tokens are not estimated here: the API reports exact usage for every turn
+        return [{"role": "user", "content": [
+            {"type": "text", "text": context_prompt, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": step_prompt},
+        ]}]
+
+    def log_step_result(self, result: dict):
+        self.logger.info(f"{_TAG_IMPLEMENTATION} Step implementation completed")
+        self.logger.info(f"  Total input tokens: {result['total_input_tokens']}")
+        self.logger.info(f"  Total output tokens: {result['total_output_tokens']}")
+        self.logger.info(f"  Total API duration: {result.get('total_api_duration', 0):.2f}s")
 
-        # Initialize token tracking
-        messages = [{"role": "user", "content": prompt}]
-        input_tokens = len(prompt.split()) + len(self._system_prompt.split()) + len(self._tools_prompt.split())
-        self.logger.info(f"{Colors.BRIGHT_MAGENTA}[AI REQUEST]{Colors.END} Estimated input tokens: {input_tokens}")
+    def implement_step(self, step_text: str):
+        """Implement a step by processing its components (goals, knowledge, plans, screens, etc.)"""
+        messages = self.build_step_messages(step_text)
 
         # Run the streaming conversation
         with LoggingUtil.Span(f"Streaming conversation"):
             result = self.run_streaming_conversation(self._system_prompt, messages)
 
-        self.logger.info(f"{Colors.BRIGHT_GREEN}[IMPLEMENTATION]{Colors.END} Step implementation completed")
-        self.logger.info(f"  Total input tokens: {input_tokens}")
-        self.logger.info(f"  Total output tokens: {result['total_output_tokens']}")
-        self.logger.info(f"  Total API duration: {result.get('total_api_duration', 0):.2f}s")
+        self.log_step_result(result)
+        return result
 
+    async def implement_step_async(self, step_text: str):
+        """Async version of implement_step, used to implement several steps concurrently"""
+        messages = self.build_step_messages(step_text)
+
+        result = await self.run_streaming_conversation_async(self._system_prompt, messages)
+
+        self.log_step_result(result)
         return result
+
+    def implement_steps_batch(self, steps: list[str]) -> list[dict]:
+        """
+        Implement steps through the Message Batches API, at half the price of regular requests.
+
+        Conversations advance in lockstep: each round submits the next turn of every unfinished step
+        as one batch, then executes the returned tool calls in step order. All steps get their project
+        context before any of them runs, so none sees the edits of the others: only independent steps
+        should be implemented this way.
+
+        Raises RuntimeError if the batch request of any step failed.
+        """
+        if self.provider != 'anthropic':
+            raise ValueError(f"Message batches are not supported for provider: {self.provider}")
+
+        system = self.anthropic_system_blocks(self._system_prompt)
+        tools = self.get_anthropic_tools_schema()
+
+        results = {
+            f"step-{i+1}": {
+                "messages": self.build_step_messages(step),
+                "max_tokens": MAX_OUTPUT_TOKENS,
+                "total_input_tokens": 0,
+                "total_output_tokens": 0,
+                "total_api_duration": 0.0
+            }
+            for i, step in enumerate(steps)
+        }
+
+        pending = list(results)
+        failed = []
+        round_count = 0
+        while pending:
+            round_count += 1
+            with LoggingUtil.Span(f"Batch round #{round_count} ({len(pending)} conversations)"):
+                self.logger.info(f"{_TAG_AI_REQUEST} Submitting batch round #{round_count} with {len(pending)} conversations")
+                for custom_id in pending:
+                    self.move_cache_breakpoint(results[custom_id]["messages"])
+
+                api_start_time = time.time()
+                final_messages = self.retry_with_backoff(lambda: self.anthropic_client.batch_create({
+                    custom_id: {
+                        "model": "claude-sonnet-4-20250514",
+                        "max_tokens": results[custom_id]["max_tokens"],
+                        "temperature": 0,
+                        "system": system,
+                        "tools": tools,
+                        "messages": results[custom_id]["messages"]
+                    }
+                    for custom_id in pending
+                }))
+                # Every conversation waited for the whole batch, so each is accounted its share of the wait
+                api_call_duration = (time.time() - api_start_time) / len(pending)
+
+                next_pending = []
+                for custom_id in pending:
+                    result = results[custom_id]
+                    result["total_api_duration"] += api_call_duration
+
+                    final_message = final_messages.get(custom_id)
+                    if final_message is None:
+                        self.logger.info(f"{_TAG_ERROR} Batch request for {custom_id} failed, stopping its conversation")
+                        failed.append(custom_id)
+                        continue
+
+                    result["total_input_tokens"] += final_message.usage.input_tokens
+                    result["total_output_tokens"] += final_message.usage.output_tokens
+                    # Same policy as the streaming conversations: a cut-off turn is repeated once with a larger limit
+                    if final_message.stop_reason == "max_tokens" and result["max_tokens"] < MAX_OUTPUT_TOKENS_RETRY:
+                        self.logger.info(f"{_TAG_RETRY} {custom_id}: response hit the {result['max_tokens']} output tokens limit, retrying with {MAX_OUTPUT_TOKENS_RETRY}")
+                        result["max_tokens"] = MAX_OUTPUT_TOKENS_RETRY
+                        next_pending.append(custom_id)
+                        continue
+                    result["max_tokens"] = MAX_OUTPUT_TOKENS
+
+                    self.log_anthropic_response(final_message, api_call_duration)
+                    result["messages"].append({
+                        "role": "assistant",
+                        "content": final_message.content
+                    })
+
+                    tool_calls = [block for block in final_message.content if hasattr(block, 'type') and block.type == "tool_use"]
+                    if not tool_calls:
+                        self.logger.info(f"{_TAG_CONVERSATION} {custom_id}: no more tool calls, conversation complete")
+                        continue
+
+                    self.logger.info(f"{_TAG_TOOL_EXECUTION} {custom_id}: processing {len(tool_calls)} tool calls")
+                    tool_results = self.run_anthropic_tool_calls(tool_calls)
+                    result["messages"].append({
+                        "role": "user",
+                        "content": tool_results
+                    })
+                    next_pending.append(custom_id)
+
+                pending = next_pending
+
+        for result in results.values():
+            self.log_step_result(result)
+        if failed:
+            raise RuntimeError(f"Batch requests failed for {len(failed)} of {len(steps)} steps: {', '.join(failed)}")
+        return list(results.values())
@@ -2,7 +2,6 @@ import os
 import logging
 from io import StringIO
 
-from pylint import run_pylint
 from colors import Colors
 from phase_manager import State, Phase, Context
 from pylint.lint import Run
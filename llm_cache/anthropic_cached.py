@@ -1,18 +1,26 @@
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 from copy import deepcopy
-from typing import Iterator
 from anthropic import Anthropic, AsyncAnthropic
 from anthropic.types import Message
 from colors import Colors
 from file_based_cache import CacheMetadata, FileBasedCache, CacheKey, PersistentCounter, Sanitizer
 from pathlib import Path
 import logging
+import time
 
 
 DEV_CACHE_DIR = "test_outputs/.llm_cache"
 REPORT_CACHE_MISSES = True
 
 
+def system_prompt_preview(kwargs: dict) -> str:
+    """First 100 characters of the system prompt, which is either a string or a list of content blocks"""
+    system = kwargs.get('system', '<no system prompt>')
+    if isinstance(system, list):
+        system = system[0].get('text', '') if system else ''
+    return system[:100]
+
+
 class Counter:
     def __init__(self):
         self.counter = 0
@@ -81,6 +89,20 @@ class CachedAnthropic:
         
         self.logger = logging.getLogger(CachedAnthropic.__class__.__qualname__)
         
+    @asynccontextmanager
+    async def async_session(self):
+        """
+        Scope async requests to the event loop they run in.
+
+        The AsyncAnthropic connection pool is bound to the loop that first used it, and every asyncio.run
+        starts a new loop, so the client is closed when the loop's work is done and replaced for the next one.
+        """
+        try:
+            yield
+        finally:
+            await self.async_client.close()
+            self.async_client = AsyncAnthropic()
+
     def report_cache_miss(self, key: CacheKey, info: str):
         if REPORT_CACHE_MISSES:
             info_formatted = info.replace('\n', ' ').strip()
@@ -92,7 +114,7 @@ class CachedAnthropic:
             self.logger.info(f"{Colors.BRIGHT_GREEN}Cache hit [{key.hash[:8]}]: {info_formatted}{Colors.END}")
 
     def create(self, **kwargs) -> Message:
-        info = f"create {kwargs.get('system', '<no system prompt>')[:100]}"
+        info = f"create {system_prompt_preview(kwargs)}"
         cache_key = self.cache.key_for_callable(self.client.messages.create, **kwargs)
         cached_response = self.cache.get(cache_key)
         if cached_response is not None:
@@ -105,7 +127,7 @@ class CachedAnthropic:
             return result
 
     async def async_create(self, **kwargs) -> Message:
-        info = f"async_create {kwargs.get('system', '<no system prompt>')[:100]}"
+        info = f"async_create {system_prompt_preview(kwargs)}"
         cache_key = self.cache.key_for_callable(self.async_client.messages.create, **kwargs)
         cached_response = self.cache.get(cache_key)
         if cached_response is not None:
@@ -118,9 +140,53 @@ class CachedAnthropic:
             return result
             
 
+    def batch_create(self, requests: dict[str, dict], poll_interval: float = 5.0, max_poll_interval: float = 60.0) -> dict[str, Message]:
+        """
+        Create messages for several requests, keyed by custom id, through the Message Batches API.
+
+        Requests share cache entries with create(): cached ones are answered locally and only the misses
+        are submitted. Returns the messages of succeeded requests; failed ones are missing from the result.
+        """
+        results: dict[str, Message] = {}
+        pending_keys: dict[str, CacheKey] = {}
+        for custom_id, params in requests.items():
+            info = f"batch {custom_id}"
+            cache_key = self.cache.key_for_callable(self.client.messages.create, **params)
+            cached_response = self.cache.get(cache_key)
+            if cached_response is not None:
+                self.report_cache_hit(cache_key, info)
+                results[custom_id] = cached_response
+            else:
+                self.report_cache_miss(cache_key, info)
+                pending_keys[custom_id] = cache_key
+
+        if not pending_keys:
+            return results
+
+        batch = self.client.messages.batches.create(requests=[
+            {"custom_id": custom_id, "params": requests[custom_id]} for custom_id in pending_keys
+        ])
+        self.logger.info(f"Submitted message batch {batch.id} with {len(pending_keys)} requests")
+
+        # Batches take minutes to hours, so poll with a growing interval
+        delay = poll_interval
+        while batch.processing_status != "ended":
+            time.sleep(delay)
+            delay = min(delay * 2, max_poll_interval)
+            batch = self.client.messages.batches.retrieve(batch.id)
+
+        for entry in self.client.messages.batches.results(batch.id):
+            if entry.result.type == "succeeded":
+                self.cache.set(pending_keys[entry.custom_id], entry.result.message)
+                results[entry.custom_id] = entry.result.message
+            else:
+                self.logger.info(f"{Colors.BRIGHT_RED}Batch request {entry.custom_id} {entry.result.type}{Colors.END}")
+
+        return results
+
     @contextmanager
     def stream(self, **kwargs):
-        info = f"stream {kwargs.get('system', '<no system prompt>')[:100]}"
+        info = f"stream {system_prompt_preview(kwargs)}"
         cache_key = self.cache.key_for_callable(self.client.messages.stream, **kwargs)
         cached_response = self.cache.get(cache_key)
         
@@ -160,3 +226,48 @@ class CachedAnthropic:
                     "final_message": final_message
                 })
 
+    @asynccontextmanager
+    async def async_stream(self, **kwargs):
+        info = f"async_stream {system_prompt_preview(kwargs)}"
+        cache_key = self.cache.key_for_callable(self.async_client.messages.stream, **kwargs)
+        cached_response = self.cache.get(cache_key)
+
+        if cached_response is not None:
+            self.report_cache_hit(cache_key, info)
+            class CachedTextStream:
+                @property
+                def text_stream(self):
+                    async def chunks():
+                        for text in cached_response["response_chunks"]:
+                            yield text
+                    return chunks()
+
+                async def get_final_message(self):
+                    return cached_response["final_message"]
+
+            yield CachedTextStream()
+        else:
+            self.report_cache_miss(cache_key, info)
+
+            async with self.async_client.messages.stream(**kwargs) as stream:
+                response_chunks = []
+                final_message = None
+                class CachingStream:
+                    @property
+                    def text_stream(self):
+                        async def chunks():
+                            async for text in stream.text_stream:
+                                response_chunks.append(text)
+                                yield text
+                        return chunks()
+
+                    async def get_final_message(self):
+                        nonlocal final_message
+                        final_message = await stream.get_final_message()
+                        return final_message
+
+                yield CachingStream()
+                self.cache.set(cache_key, {
+                    "response_chunks": response_chunks,
+                    "final_message": final_message
+                })
@@ -21,7 +21,7 @@ from extract_facts import ExtractFacts
 from execute_layouts import ExecuteLayouts
 from plan_work import PlanWork
 from execute_work import ExecuteWork
-from phase_manager import Done, PhaseManager, Context, Init, Phase, State
+from phase_manager import Done, PhaseManager, Context, Init
 from spec_processor import SpecProcessor
 from git_helper import GitHelper
 from incremental_mode import IncrementalMode
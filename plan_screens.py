@@ -3,10 +3,11 @@ import logging
 from typing import Optional
 from data_serializer import text_file
 from phase_manager import State, Phase, Context
-from with_step import with_streaming_step
+from with_step import with_streaming_step, stream_text
 from fileutils import load_prompt_template
 
 SYSTEM_PROMPT = "You are a senior web developer who specialized in Django."
+SYSTEM_PROMPT_WORDS = len(SYSTEM_PROMPT.split())
 
 def plan_stories(project_path: str, context: Context, spec: Optional[str] = None, 
                            old_spec: Optional[str] = None, new_spec: Optional[str] = None, 
@@ -17,8 +18,6 @@ def plan_stories(project_path: str, context: Context, spec: Optional[str] = None
     step_message = "Planning user stories and screens incrementally..." if is_incremental else "Planning user stories and screens..."
     
     with with_streaming_step(step_message) as (input_tokens, output_tokens):
-        response_text = ""
-        
         if is_incremental:
             user_prompt = load_prompt_template("plan_screens", incremental=True, 
                                              old_spec=old_spec, new_spec=new_spec, 
@@ -28,7 +27,7 @@ def plan_stories(project_path: str, context: Context, spec: Optional[str] = None
             models = read_models_file(project_path)
             user_prompt = load_prompt_template("plan_screens", incremental=False, spec=spec, models=models)
 
-        input_tokens[0] = len(user_prompt.split()) + len(SYSTEM_PROMPT.split())
+        input_tokens[0] = user_prompt.count(' ') + 1 + SYSTEM_PROMPT_WORDS
 
         with context.anthropic_client.stream(
             model="claude-sonnet-4-20250514",
@@ -37,11 +36,9 @@ def plan_stories(project_path: str, context: Context, spec: Optional[str] = None
             system=SYSTEM_PROMPT,
             messages=[{"role": "user", "content": user_prompt}]
         ) as stream:
-            for text in stream.text_stream:
-                response_text += text
-                output_tokens[0] += len(text.split())
+            response = stream_text(stream, input_tokens, output_tokens)
 
-    return response_text.strip()
+    return response.strip()
 
 def read_models_file(project_path: str) -> str:
     models_path = os.path.join(project_path, "web", "models.py")
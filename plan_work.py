@@ -1,17 +1,16 @@
-from typing import Optional
+import logging
 from data_serializer import text_file
 from phase_manager import State, Phase, Context
-from with_step import with_streaming_step
+from with_step import with_streaming_step, stream_text
 from fileutils import load_prompt_template
 
 SYSTEM_PROMPT = "You are a senior web developer who specialized in Django."
+SYSTEM_PROMPT_WORDS = len(SYSTEM_PROMPT.split())
 
 def plan_work(context: Context, user_prompt: str) -> str:
 
     with with_streaming_step("Planning work...") as (input_tokens, output_tokens):
-        response_text = ""
-
-        input_tokens[0] = len(user_prompt.split()) + len(SYSTEM_PROMPT.split())
+        input_tokens[0] = user_prompt.count(' ') + 1 + SYSTEM_PROMPT_WORDS
 
         with context.anthropic_client.stream(
             model="claude-sonnet-4-20250514",
@@ -20,13 +19,14 @@ def plan_work(context: Context, user_prompt: str) -> str:
             system=SYSTEM_PROMPT,
             messages=[{"role": "user", "content": user_prompt}]
         ) as stream:
-            for text in stream.text_stream:
-                response_text += text
-                output_tokens[0] += len(text.split())
+            response = stream_text(stream, input_tokens, output_tokens)
 
-    return response_text.strip()
+    return response.strip()
 
 class PlanWork(Phase):
+    def __init__(self):
+        super().__init__()
+        self.logger = logging.getLogger(__class__.__qualname__)
     description = "Generate the work to be executed (work.txt)"
 
     def run(self, state: State, context: Context) -> dict:
@@ -41,7 +41,9 @@ class PlanWork(Phase):
         else:
             user_prompt = load_prompt_template("plan_work", stories=stories)
 
-        print(user_prompt)
+        # The prompt contains all stories and, incrementally, the old work, so it is only dumped in verbose mode
+        if context.verbose:
+            self.logger.info(user_prompt)
         plan = plan_work(context, user_prompt)
 
         return {
@@ -0,0 +1,27 @@
+import os
+from types import SimpleNamespace
+
+from implementation_agent import ImplementationAgent
+
+
+def make_agent(project_path) -> ImplementationAgent:
+    context = SimpleNamespace(anthropic_client=None, verbose=False)
+    return ImplementationAgent(str(project_path), context, provider='anthropic', interactive=False)
+
+
+def test_read_after_same_size_rewrite_returns_new_content(tmp_path):
+    (tmp_path / "web").mkdir()
+    views = tmp_path / "web" / "views.py"
+    views.write_text("value = 1\n")
+    agent = make_agent(tmp_path)
+
+    assert "value = 1" in agent.read_file("web/views.py")
+    stats = os.stat(views)
+
+    assert agent.write_file("web/views.py", "value = 2\n")
+    # Simulate a filesystem with coarse timestamps: the rewrite leaves mtime and size unchanged
+    os.utime(views, ns=(stats.st_atime_ns, stats.st_mtime_ns))
+
+    content = agent.read_file("web/views.py")
+    assert "value = 2" in content
+    assert "value = 1" not in content
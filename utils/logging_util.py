@@ -1,5 +1,7 @@
 import functools
 import logging
+import re
+import sys
 import typing
 from datetime import datetime, timezone
 from os import linesep
@@ -39,6 +41,14 @@ class IndentingFormatter(logging.Formatter):
         return dt.isoformat()
 
 
+class PlainFormatter(logging.Formatter):
+    """Drops ANSI color codes, for consoles that are redirected to a file or a pipe"""
+    ANSI_ESCAPE_PATTERN = re.compile(r'\033\[[0-9;]*m')
+
+    def format(self, record):
+        return self.ANSI_ESCAPE_PATTERN.sub('', super().format(record))
+
+
 class LoggerSpanExporter(SpanExporter):
 
     def __init__(self):
@@ -69,7 +79,11 @@ class LoggingUtil:
         file_handler.setFormatter(formatter)
         logger.addHandler(file_handler)
 
-        logger.addHandler(logging.StreamHandler())  # no indent
+        console_handler = logging.StreamHandler()  # no indent
+        # The log file keeps colors for the log viewer, but redirected console output gets them stripped
+        if not sys.stderr.isatty():
+            console_handler.setFormatter(PlainFormatter())
+        logger.addHandler(console_handler)
 
         if ENABLE_OPEN_TRACE:
             trace_provider = TracerProvider()
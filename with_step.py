@@ -66,4 +66,19 @@ def with_streaming_step(text):
             if output_tokens[0] > 0:
                 logger.info(f"{text} complete in {Colors.GREY}{Colors.DIM}{elapsed[0]}s (↑ {input_tokens[0]} + ↓ {output_tokens[0]} tokens){Colors.END}.")
             else:
-                logger.info(f"{text} complete in {Colors.GREY}{Colors.DIM}{elapsed[0]}s{Colors.END}.")
\ No newline at end of file
+                logger.info(f"{text} complete in {Colors.GREY}{Colors.DIM}{elapsed[0]}s{Colors.END}.")
+
+
+def stream_text(stream, input_tokens: list[int], output_tokens: list[int]) -> str:
+    """Collect the text of a streamed response, keeping the token counters of a streaming step up to date"""
+    response_parts = []
+    for text in stream.text_stream:
+        response_parts.append(text)
+        # Rough live estimate for the progress spinner, without allocating a word list per chunk
+        output_tokens[0] += text.count(' ')
+    # Replace the estimates with the exact usage reported by the API
+    final_message = stream.get_final_message()
+    if final_message is not None:
+        input_tokens[0] = final_message.usage.input_tokens
+        output_tokens[0] = final_message.usage.output_tokens
+    return ''.join(response_parts)